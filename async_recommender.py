@@ -0,0 +1,341 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import asyncpg
+
+from distance_table import DistanceTable
+from recommender import BookingResult, rank_earliest, rank_rooms
+
+
+class AsyncPostgresBookingManager:
+    """
+    asyncio counterpart of recommender.PostgresBookingManager, backed by an
+    asyncpg connection pool. Create it with `await ...create(...)`.
+    """
+    def __init__(self, pool, partitioned=False):
+        self.pool = pool
+        self.partitioned = partitioned
+
+    @classmethod
+    async def create(cls, dbname, user, password, host="localhost", port=5432,
+                     min_size=1, max_size=10):
+        pool = await asyncpg.create_pool(
+            database=dbname, user=user, password=password,
+            host=host, port=port, min_size=min_size, max_size=max_size
+        )
+        relkind = await pool.fetchval(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('bookings')"
+        )
+        return cls(pool, partitioned=relkind == "p")
+
+    async def close(self):
+        await self.pool.close()
+
+    def _pruning_filter(self):
+        """PostgresBookingManager._pruning_filter with start=$1, end=$2."""
+        if not self.partitioned:
+            return ""
+        return ("AND b.starts_at >= date_trunc('month', $1::timestamp) "
+                "AND b.starts_at < $2")
+
+    async def is_room_available(self, room_id, start_time: datetime,
+                                end_time: datetime):
+        query = f"""
+            SELECT COUNT(*) FROM bookings b
+            WHERE b.timeslot && tsrange($1, $2) AND b.room_id = $3
+            {self._pruning_filter()}
+        """
+        count = await self.pool.fetchval(query, start_time, end_time, room_id)
+        return count == 0
+
+    async def get_available_rooms(self, start_time: datetime,
+                                  end_time: datetime, min_capacity=None,
+                                  room_types=None, levels=None):
+        filters, args = self._room_filters(
+            min_capacity, room_types, levels, first_param=3
+        )
+        query = f"""
+            SELECT r.room_id, r.name, r.grid, r.capacity, r.type
+            FROM rooms r
+            WHERE NOT EXISTS (
+                SELECT 1 FROM bookings b
+                WHERE b.room_id = r.room_id
+                AND b.timeslot && tsrange($1, $2)
+                {self._pruning_filter()}
+            )
+            {filters}
+        """
+        rows = await self.pool.fetch(query, start_time, end_time, *args)
+        return [tuple(row) for row in rows]
+
+    async def find_free_slots(self, window_start: datetime,
+                              window_end: datetime, duration: timedelta,
+                              min_capacity=None, room_types=None, levels=None,
+                              room_ids=None):
+        """PostgresBookingManager.find_free_slots with start=$1, end=$2."""
+        filters, args = self._room_filters(
+            min_capacity, room_types, levels, room_ids, first_param=4
+        )
+        query = f"""
+            WITH candidates AS (
+                SELECT r.room_id, r.name, r.grid, r.capacity, r.type
+                FROM rooms r
+                WHERE TRUE
+                {filters}
+            ),
+            busy AS (
+                SELECT b.room_id,
+                       greatest(lower(b.timeslot), $1::timestamp) AS busy_start,
+                       least(upper(b.timeslot), $2::timestamp) AS busy_end
+                FROM bookings b
+                JOIN candidates c ON c.room_id = b.room_id
+                WHERE b.timeslot && tsrange($1, $2)
+                {self._pruning_filter()}
+                UNION ALL
+                -- zero-length sentinel so the gap before window_end counts
+                SELECT c.room_id, $2::timestamp, $2::timestamp
+                FROM candidates c
+            ),
+            gaps AS (
+                SELECT room_id,
+                       coalesce(max(busy_end) OVER (
+                           PARTITION BY room_id
+                           ORDER BY busy_start, busy_end
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ), $1::timestamp) AS gap_start,
+                       busy_start AS gap_end
+                FROM busy
+            )
+            SELECT c.room_id, c.name, c.grid, c.capacity, c.type,
+                   g.gap_start, g.gap_end
+            FROM gaps g
+            JOIN candidates c ON c.room_id = g.room_id
+            WHERE g.gap_end - g.gap_start >= $3
+            ORDER BY g.gap_start, c.room_id
+        """
+        rows = await self.pool.fetch(query, window_start, window_end,
+                                     duration, *args)
+        return [tuple(row) for row in rows]
+
+    def _insert_booking_sql(self):
+        """PostgresBookingManager._insert_booking_sql, numbered $1..$5."""
+        if self.partitioned:
+            return """
+                INSERT INTO bookings (room_id, timeslot, starts_at,
+                                      booked_by, title)
+                VALUES ($1, tsrange($2, $3, '[)'), $2, $4, $5)
+                RETURNING booking_id
+            """
+        return """
+            INSERT INTO bookings (room_id, timeslot, booked_by, title)
+            VALUES ($1, tsrange($2, $3, '[)'), $4, $5)
+            RETURNING booking_id
+        """
+
+    async def book_room(self, room_id, start_time: datetime,
+                        end_time: datetime, booked_by, title="",
+                        suggestions=3):
+        """Same contract as PostgresBookingManager.book_room."""
+        try:
+            booking_id = await self.pool.fetchval(
+                self._insert_booking_sql(), room_id, start_time, end_time,
+                booked_by, title
+            )
+        except asyncpg.ExclusionViolationError:
+            alternatives = await self.suggest_alternatives(
+                room_id, start_time, end_time, suggestions
+            )
+            return BookingResult("slot_taken", None, room_id, start_time,
+                                 end_time, alternatives)
+        except (asyncpg.CheckViolationError,
+                asyncpg.ForeignKeyViolationError):
+            return BookingResult("invalid", None, room_id, start_time,
+                                 end_time, [])
+        return BookingResult("booked", booking_id, room_id, start_time,
+                             end_time, [])
+
+    async def book_rooms(self, requests, suggestions=3):
+        """
+        Same contract as PostgresBookingManager.book_rooms: one connection
+        and one transaction, with a savepoint (nested transaction) per
+        insert so a conflict only rolls back that booking.
+        """
+        insert = self._insert_booking_sql()
+        results = []
+        async with self.pool.acquire() as conn, conn.transaction():
+            for request in requests:
+                room_id = request["room_id"]
+                start, end = request["start_time"], request["end_time"]
+                try:
+                    async with conn.transaction():
+                        booking_id = await conn.fetchval(
+                            insert, room_id, start, end,
+                            request["booked_by"], request.get("title", "")
+                        )
+                    status = "booked"
+                except asyncpg.ExclusionViolationError:
+                    status, booking_id = "slot_taken", None
+                except (asyncpg.CheckViolationError,
+                        asyncpg.ForeignKeyViolationError):
+                    status, booking_id = "invalid", None
+                results.append(BookingResult(status, booking_id, room_id,
+                                             start, end, []))
+
+        # Suggestions are only looked up after the batch has committed
+        for i, result in enumerate(results):
+            if result.status == "slot_taken":
+                alternatives = await self.suggest_alternatives(
+                    result.room_id, result.start_time, result.end_time,
+                    suggestions
+                )
+                results[i] = result._replace(alternatives=alternatives)
+        return results
+
+    async def suggest_alternatives(self, room_id, start_time: datetime,
+                                   end_time: datetime, limit=3,
+                                   search_hours=8):
+        """Same contract as PostgresBookingManager.suggest_alternatives."""
+        duration = end_time - start_time
+        same_room = await self.find_free_slots(
+            start_time, start_time + timedelta(hours=search_hours), duration,
+            room_ids=[room_id]
+        )
+        alternatives = [
+            (rid, name, gap_start, gap_start + duration)
+            for rid, name, _, _, _, gap_start, _ in same_room[:limit]
+        ]
+        if len(alternatives) >= limit:
+            return alternatives
+
+        row = await self.pool.fetchrow(
+            "SELECT level, capacity FROM rooms WHERE room_id = $1", room_id
+        )
+        if row is None:
+            return alternatives
+        level, capacity = row
+        other_rooms = await self.get_available_rooms(
+            start_time, end_time, min_capacity=capacity,
+            levels=[level] if level is not None else None
+        )
+        for rid, name, _, _, _ in sorted(other_rooms, key=lambda r: r[3] or 0):
+            if len(alternatives) >= limit:
+                break
+            if rid != room_id:
+                alternatives.append((rid, name, start_time, end_time))
+        return alternatives
+
+    @staticmethod
+    def _room_filters(min_capacity=None, room_types=None, levels=None,
+                      room_ids=None, first_param=1):
+        """Same filters as PostgresBookingManager._room_filters, numbered $n."""
+        clauses, args = [], []
+        if min_capacity is not None:
+            args.append(min_capacity)
+            n = first_param + len(args) - 1
+            clauses.append(f"AND (r.capacity IS NULL OR r.capacity >= ${n})")
+        if room_types:
+            args.append([t.replace(" ", "") for t in room_types])
+            clauses.append(
+                f"AND r.type = ANY(${first_param + len(args) - 1}::text[])"
+            )
+        if levels:
+            args.append(list(levels))
+            clauses.append(
+                f"AND r.level = ANY(${first_param + len(args) - 1}::int[])"
+            )
+        if room_ids:
+            args.append(list(room_ids))
+            clauses.append(
+                f"AND r.room_id = ANY(${first_param + len(args) - 1}::text[])"
+            )
+        return "\n            ".join(clauses), args
+
+
+class AsyncMeetingRoomRecommender:
+    """
+    asyncio counterpart of recommender.MeetingRoomRecommender. Ranking is
+    the shared recommender.rank_rooms / rank_earliest over the grids
+    stored in Postgres, so both recommenders return the same rooms; many
+    calls can share one event loop.
+    """
+    def __init__(self, booking_manager: AsyncPostgresBookingManager,
+                 distance_table: DistanceTable = None, metric="euclidean"):
+        self.booking_manager = booking_manager
+        self.distance_table = distance_table
+        self.metric = metric
+
+    async def recommend(self, user_grids: list[str], start_time: datetime,
+                        end_time: datetime, top_k=3, attendees=None,
+                        room_types=None, levels=None):
+        """Same arguments and result as MeetingRoomRecommender.recommend."""
+        available_rooms = await self.booking_manager.get_available_rooms(
+            start_time, end_time, min_capacity=attendees,
+            room_types=room_types, levels=levels
+        )
+        if not available_rooms:
+            return []
+        await self._ensure_fresh_table()
+        return rank_rooms(available_rooms, user_grids, top_k,
+                          self.distance_table, self.metric)
+
+    async def recommend_earliest(self, user_grids: list[str],
+                                 window_start: datetime, window_end: datetime,
+                                 duration: timedelta, top_k=3, attendees=None,
+                                 room_types=None, levels=None):
+        """Same arguments and result as MeetingRoomRecommender.recommend_earliest."""
+        free_slots = await self.booking_manager.find_free_slots(
+            window_start, window_end, duration, min_capacity=attendees,
+            room_types=room_types, levels=levels
+        )
+        await self._ensure_fresh_table()
+        return rank_earliest(free_slots, user_grids, duration, top_k,
+                             self.distance_table, self.metric)
+
+    async def recommend_many(self, requests):
+        """
+        Serves a batch of requests concurrently. Each request is a dict of
+        recommend() keyword arguments; results come back in the same order.
+        """
+        return await asyncio.gather(
+            *(self.recommend(**request) for request in requests)
+        )
+
+    async def _ensure_fresh_table(self):
+        if self.distance_table is not None:
+            # A stale table is rebuilt (map hash plus Neo4j reads); keep
+            # that off the event loop.
+            await asyncio.to_thread(self.distance_table.ensure_fresh)
+
+
+async def main():
+    pg_manager = await AsyncPostgresBookingManager.create(
+        dbname="meeting_rooms",
+        user="postgres",
+        password="postgres",
+        host="localhost",
+        port=5432,
+        max_size=10
+    )
+    recommender = AsyncMeetingRoomRecommender(pg_manager)
+
+    day = datetime.strptime("2025-06-26 09:00", "%Y-%m-%d %H:%M")
+    requests = [
+        {
+            "user_grids": ["G2", "H2"],
+            "start_time": day + timedelta(hours=h),
+            "end_time": day + timedelta(hours=h + 1),
+        }
+        for h in range(8)
+    ]
+    try:
+        results = await recommender.recommend_many(requests)
+        for request, rooms in zip(requests, results):
+            print(f"{request['start_time']:%H:%M}: "
+                  + ", ".join(f"{name} ({dist:.2f})"
+                              for name, _, dist, _, _ in rooms))
+    finally:
+        await pg_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from endeavor_rag_directory import (
+    REQUEST_TIMEOUT, AsyncEndeavorRAG, get_llm_cache,
+    make_async_llm_client, make_async_neo4j_driver,
+)
+from latency_stats import percentile
+from llm_cache import normalize_query
+from llm_router import AsyncLLMRouter, load_routes
+from location_parser import UnknownLocation
+
+# Batch navigation: questions in, directions out, both as JSON Lines.
+#
+# Each input line is {"id": "...", "query": "How do I get from X to Y?"}
+# (or just a JSON string, whose id is then its line number). Identical
+# queries, ignoring case and spacing, are answered once and the answer is
+# written for every id. Up to --concurrency queries run at a time through
+# parse -> resolve -> route -> render on one AsyncEndeavorRAG, and LLM
+# calls are additionally held to --llm-rate per second. Every result is
+# appended to --output as soon as it is ready, with per-stage timings in
+# milliseconds; re-running with the same --output skips ids already there,
+# so an interrupted batch resumes where it stopped. A finished run compacts
+# --output to one line per id (the latest result).
+#
+#   python batch_navigate.py --input questions.jsonl --output answers.jsonl \
+#       --concurrency 16 --llm-rate 2
+
+STAGES = ("parse", "resolve", "route", "render", "polish")
+
+
+class RateLimiter:
+    """Token bucket: `rate` acquisitions per second, bursts up to `burst`."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def read_queries(path):
+    """(id, query) pairs from a JSON Lines file."""
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                yield str(lineno), item
+            else:
+                query = item.get("query") or item.get("user_input")
+                yield str(item.get("id", lineno)), query
+
+
+def finished_ids(path, retry_errors):
+    """Ids already answered in a previous run of the same output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # half-written last line of an interrupted run
+            if result.get("status") == "ok" or not retry_errors:
+                done.add(result["id"])
+    return done
+
+
+def compact_output(path):
+    """
+    Rewrites the output with one line per id, holding its latest result.
+    Retried ids (--retry-errors) otherwise keep their old error line too.
+    """
+    latest = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[result["id"]] = line if line.endswith("\n") else line + "\n"
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(latest.values())
+    os.replace(tmp_path, path)
+
+
+async def navigate(rag, query, polish):
+    """One query through every stage; returns (result fields, timings)."""
+    timings = {}
+    began = time.perf_counter()
+
+    def lap(stage):
+        nonlocal began
+        now = time.perf_counter()
+        timings[stage] = round((now - began) * 1000, 2)
+        began = now
+
+    parsed = await rag.parse_user_query(query)
+    lap("parse")
+    start, end = await rag.resolve_parsed(query, parsed)
+    lap("resolve")
+    if start is None:
+        directions = await rag.describe_location(end)
+        lap("render")
+        return {"start": None, "end": end, "path": [end],
+                "directions": directions}, timings
+
+    route = await rag.get_route(start, end)
+    lap("route")
+    directions = rag.render_route(route)
+    lap("render")
+    if polish and len(route) > 1:
+        directions = await rag.polish_instructions(directions)
+        lap("polish")
+    return {"start": start, "end": end,
+            "path": [node["name"] for node in route],
+            "directions": directions}, timings
+
+
+async def answer(rag, query, polish, timeout):
+    began = time.perf_counter()
+    try:
+        async with asyncio.timeout(timeout):
+            fields, timings = await navigate(rag, query, polish)
+        result = {"status": "ok", **fields}
+    except UnknownLocation as e:
+        result, timings = {"status": "error", "error": str(e),
+                           "candidates": [n for n, _ in e.candidates]}, {}
+    except TimeoutError:
+        result, timings = {"status": "error", "error": "timed out"}, {}
+    except Exception as e:
+        result, timings = {"status": "error", "error": repr(e)}, {}
+    timings["total"] = round((time.perf_counter() - began) * 1000, 2)
+    result["timings"] = timings
+    return result
+
+
+async def run(rag, groups, out, concurrency, polish, timeout):
+    """Answers each unique query once and writes a line per id."""
+    queue = asyncio.Queue()
+    for key, items in groups.items():
+        queue.put_nowait((items[0][1], items))
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            query, items = queue.get_nowait()
+            result = await answer(rag, query, polish, timeout)
+            results.append(result)
+            for qid, original in items:
+                out.write(json.dumps({"id": qid, "query": original, **result},
+                                     ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[{len(results)}/{len(groups)}] {result['status']:5} "
+                  f"{result['timings']['total']:8.1f} ms  {query}")
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def print_summary(results, total_ids, skipped, elapsed):
+    ok = sum(r["status"] == "ok" for r in results)
+    print(f"\n{total_ids} ids, {skipped} skipped (done or repeated), {len(results)} unique "
+          f"queries run ({ok} ok, {len(results) - ok} errors) in {elapsed:.1f} s")
+    print(f"{'stage':>8} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in STAGES + ("total",):
+        values = sorted(r["timings"][stage] for r in results
+                        if stage in r["timings"])
+        if values:
+            print(f"{stage:>8} {len(values):6d} {percentile(values, 50):9.1f} "
+                  f"{percentile(values, 95):9.1f} {values[-1]:9.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True,
+                        help="JSON Lines of {\"id\", \"query\"} objects")
+    parser.add_argument("--output", required=True,
+                        help="JSON Lines results; appended to and resumed from")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-rate", type=float, default=2.0,
+                        help="max LLM calls per second")
+    parser.add_argument("--llm-burst", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help="seconds per query")
+    parser.add_argument("--polish", action="store_true",
+                        help="also rewrite directions with the LLM")
+    parser.add_argument("--routes",
+                        help="LLM routes JSON (see llm_router.py)")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="re-run ids whose previous result was an error")
+    args = parser.parse_args()
+
+    done = finished_ids(args.output, args.retry_errors)
+    groups = {}
+    total_ids = skipped = 0
+    for qid, query in read_queries(args.input):
+        total_ids += 1
+        if qid in done or not query:
+            skipped += 1
+            continue
+        done.add(qid)  # an id repeated in the input is answered once
+        groups.setdefault(normalize_query(query), []).append((qid, query))
+
+    URI = "neo4j://localhost:7687"
+    AUTH = ("neo4j", "graphrag")
+    rag = AsyncEndeavorRAG(
+        make_async_neo4j_driver(URI, *AUTH, pool_size=args.concurrency),
+        cache=get_llm_cache(),
+        limiter=RateLimiter(args.llm_rate, args.llm_burst),
+        router=AsyncLLMRouter(
+            load_routes(args.routes),
+            lambda key, url: make_async_llm_client(
+                key, url, max_connections=args.concurrency),
+        ),
+    )
+    began = time.perf_counter()
+    try:
+        with open(args.output, "a") as out:
+            results = await run(rag, groups, out, args.concurrency,
+                                args.polish, args.timeout)
+        compact_output(args.output)
+    finally:
+        await rag.close()
+    print_summary(results, total_ids, skipped, time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
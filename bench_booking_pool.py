@@ -0,0 +1,60 @@
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from recommender import PG_CONFIG, PostgresBookingManager
+
+# Concurrent load test for PostgresBookingManager.
+# Runs the same availability workload with a pool of size 1 (equivalent to
+# the old single shared connection) and with a larger pool, then prints the
+# throughput of each so the difference is visible.
+#
+#   python bench_booking_pool.py --threads 16 --requests 200 --maxconn 8
+
+
+def run_load(manager, threads, requests_per_thread, base_time):
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(requests_per_thread):
+                start = base_time + timedelta(minutes=15 * ((offset + i) % 32))
+                manager.get_available_rooms(start, start + timedelta(hours=1))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    began = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - began
+    return threads * requests_per_thread / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100,
+                        help="requests per thread")
+    parser.add_argument("--maxconn", type=int, default=8)
+    parser.add_argument("--date", default="2025-06-26 09:00")
+    args = parser.parse_args()
+
+    base_time = datetime.strptime(args.date, "%Y-%m-%d %H:%M")
+    for maxconn in (1, args.maxconn):
+        manager = PostgresBookingManager(**PG_CONFIG, minconn=1, maxconn=maxconn)
+        try:
+            rps, errors = run_load(manager, args.threads, args.requests, base_time)
+        finally:
+            manager.close()
+        print(f"maxconn={maxconn:<3} threads={args.threads:<3} "
+              f"{rps:8.1f} req/s  errors={len(errors)}")
+        for e in errors[:3]:
+            print("   ", repr(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bookings_partitions import ensure_partitions, next_month
+from recommender import PG_CONFIG, PostgresBookingManager
+
+# Booking contention benchmark.
+# Many clients try to book half-hour slots in a handful of popular rooms on
+# a scratch day, so most attempts collide on the no_overlap constraint.
+# Reports committed bookings per second and the conflict rate, then deletes
+# everything it booked.
+#
+#   python bench_bookings.py --clients 32 --attempts 200 --rooms L1-1065,L1-5065
+
+BENCH_USER = "bench_bookings"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=100,
+                        help="booking attempts per client")
+    parser.add_argument("--rooms", default="L1-1065,L1-5065,L1-2130",
+                        help="comma separated popular room ids")
+    parser.add_argument("--day", default="2030-01-07",
+                        help="scratch day to book on (YYYY-MM-DD)")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="bookings per book_rooms() call (1 = book_room)")
+    parser.add_argument("--maxconn", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    room_ids = args.rooms.split(",")
+    day = datetime.strptime(args.day + " 08:00", "%Y-%m-%d %H:%M")
+    slots = [day + timedelta(minutes=30 * i) for i in range(20)]
+    manager = PostgresBookingManager(**PG_CONFIG, maxconn=args.maxconn)
+    if manager.partitioned:
+        with manager.connection() as conn:
+            ensure_partitions(conn, day, next_month(day))
+
+    counts = {"booked": 0, "slot_taken": 0, "invalid": 0}
+    lock = threading.Lock()
+
+    def client(n):
+        rng = random.Random(args.seed * 1000 + n)
+        local = dict.fromkeys(counts, 0)
+        for _ in range(args.attempts // args.batch):
+            requests = []
+            for _ in range(args.batch):
+                start = rng.choice(slots)
+                requests.append({
+                    "room_id": rng.choice(room_ids),
+                    "start_time": start,
+                    "end_time": start + timedelta(minutes=30),
+                    "booked_by": BENCH_USER,
+                })
+            if args.batch == 1:
+                results = [manager.book_room(**requests[0], suggestions=0)]
+            else:
+                results = manager.book_rooms(requests, suggestions=0)
+            for result in results:
+                local[result.status] += 1
+        with lock:
+            for status, count in local.items():
+                counts[status] += count
+
+    workers = [threading.Thread(target=client, args=(n,))
+               for n in range(args.clients)]
+    began = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    attempts = sum(counts.values())
+    print(f"{attempts} attempts from {args.clients} clients "
+          f"in {elapsed:.2f}s ({attempts / elapsed:.1f} attempts/s)")
+    print(f"committed: {counts['booked']} ({counts['booked'] / elapsed:.1f}/s)")
+    print(f"conflicts: {counts['slot_taken']} "
+          f"({counts['slot_taken'] / max(attempts, 1):.1%})")
+    if counts["invalid"]:
+        print(f"invalid:   {counts['invalid']}")
+
+    with manager.connection() as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM bookings WHERE booked_by = %s", (BENCH_USER,))
+    manager.close()
+
+
+if __name__ == "__main__":
+    main()
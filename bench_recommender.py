@@ -0,0 +1,220 @@
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from distance_table import DistanceTable
+from endeavor_graph import EndeavorGraph
+from latency_stats import percentile
+from recommender import (
+    PG_CONFIG, MeetingRoomRecommender, PostgresBookingManager,
+)
+
+# Latency benchmark and workload replay for MeetingRoomRecommender.recommend.
+#
+# A workload is a list of recommend() calls. It is either generated from the
+# --participants / --window-minutes mixes (random grid cells and start
+# times on --day) or replayed from a JSON Lines file written by --record or
+# captured elsewhere:
+#   {"user_grids": ["G2", "H2"], "start": "2025-06-26 13:00",
+#    "end": "2025-06-26 14:00"}
+# Generated requests leave out "attendees": room capacities are not known
+# yet (see importData.py), so the filter would only measure the NULL check.
+#
+# Every combination of --concurrency and --cache is run against the local
+# Postgres and Neo4j, and p50/p95/p99 latency, throughput and per-stage time
+# and call counts are printed for each, so regressions show up as diffs.
+#
+#   python bench_recommender.py --requests 500 --concurrency 1,8,32 \
+#       --participants 2,6 --window-minutes 30,60 --cache both
+
+NEO4J_CONFIG = dict(uri="neo4j://localhost:7687", user="neo4j",
+                    password="neo4j123")
+STAGES = ("availability", "table_refresh", "score")
+
+
+class StageStats:
+    """Thread-safe per-stage call counts and accumulated seconds."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = dict.fromkeys(STAGES, 0)
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.calls[stage] += 1
+            self.seconds[stage] += seconds
+
+
+class Timed:
+    """Proxy that times one method of the wrapped object as a stage."""
+    def __init__(self, target, method, stage, stats):
+        self._target = target
+        self._method = method
+        self._stage = stage
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name != self._method:
+            return attr
+
+        def timed(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._stats.add(self._stage, time.perf_counter() - began)
+        return timed
+
+
+def generate_workload(n, participants, windows, day, grids, seed):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(n):
+        start = day + timedelta(minutes=15 * rng.randrange(36))
+        count = rng.choice(participants)
+        workload.append({
+            "user_grids": [rng.choice(grids) for _ in range(count)],
+            "start_time": start,
+            "end_time": start + timedelta(minutes=rng.choice(windows)),
+        })
+    return workload
+
+
+def load_workload(path):
+    workload = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item["start_time"] = datetime.strptime(item.pop("start"),
+                                                   "%Y-%m-%d %H:%M")
+            item["end_time"] = datetime.strptime(item.pop("end"),
+                                                 "%Y-%m-%d %H:%M")
+            workload.append(item)
+    return workload
+
+
+def save_workload(path, workload):
+    with open(path, "w") as f:
+        for item in workload:
+            item = dict(item)
+            item["start"] = f"{item.pop('start_time'):%Y-%m-%d %H:%M}"
+            item["end"] = f"{item.pop('end_time'):%Y-%m-%d %H:%M}"
+            f.write(json.dumps(item) + "\n")
+
+
+def run(recommender, workload, concurrency, stats):
+    latencies = []
+
+    def call(request):
+        began = time.perf_counter()
+        recommender.recommend(**request)
+        return time.perf_counter() - began
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, workload))
+    elapsed = time.perf_counter() - began
+
+    # Whatever recommend() spent outside the timed stages is scoring
+    with stats.lock:
+        stats.calls["score"] = len(workload)
+        stats.seconds["score"] = sum(latencies) - stats.seconds["availability"] \
+            - stats.seconds["table_refresh"]
+    return sorted(latencies), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--participants", default="2,4",
+                        help="comma separated participant counts to mix")
+    parser.add_argument("--window-minutes", default="30,60",
+                        help="comma separated meeting lengths to mix")
+    parser.add_argument("--concurrency", default="1,8",
+                        help="comma separated thread counts to run")
+    parser.add_argument("--cache", choices=["on", "off", "both"],
+                        default="both", help="use the precomputed distance table")
+    parser.add_argument("--metric", default="euclidean",
+                        choices=["euclidean", "walking"])
+    parser.add_argument("--day", default="2025-06-26 09:00")
+    parser.add_argument("--map", default="en-map.json")
+    parser.add_argument("--table", default="distance_table.bin")
+    parser.add_argument("--replay", help="JSON Lines workload to replay")
+    parser.add_argument("--record", help="write the workload as JSON Lines")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    with open(args.map) as f:
+        grids = sorted({loc["location"]["grid"] for loc in json.load(f)
+                        if loc["location"].get("grid")})
+    if args.replay:
+        workload = load_workload(args.replay)
+    else:
+        workload = generate_workload(
+            args.requests,
+            [int(p) for p in args.participants.split(",")],
+            [int(w) for w in args.window_minutes.split(",")],
+            datetime.strptime(args.day, "%Y-%m-%d %H:%M"), grids, args.seed
+        )
+    if args.record:
+        save_workload(args.record, workload)
+
+    pg_manager = PostgresBookingManager(**PG_CONFIG,
+                                        maxconn=max(concurrencies))
+    graph = EndeavorGraph(**NEO4J_CONFIG)
+    table = DistanceTable.load_or_build(args.map, args.table,
+                                        driver=graph.driver)
+    cache_modes = {"on": [True], "off": [False],
+                   "both": [False, True]}[args.cache]
+
+    def timed_recommender(stats, use_cache):
+        """A recommender whose Postgres and table calls are timed into stats."""
+        manager = Timed(pg_manager, "get_available_rooms", "availability",
+                        stats)
+        distance_table = Timed(table, "ensure_fresh", "table_refresh",
+                               stats) if use_cache else None
+        return MeetingRoomRecommender(graph, manager,
+                                      distance_table=distance_table,
+                                      metric=args.metric)
+
+    print(f"{len(workload)} requests, metric={args.metric}")
+    print(f"{'cache':<6}{'conc':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'req/s':>9}   per request: stage ms (calls)")
+    try:
+        for use_cache in cache_modes:
+            for concurrency in concurrencies:
+                # Fresh proxies per phase so warmup calls are not counted
+                warmup = StageStats()
+                run(timed_recommender(warmup, use_cache),
+                    workload[:args.warmup], concurrency, warmup)
+                stats = StageStats()
+                latencies, elapsed = run(timed_recommender(stats, use_cache),
+                                         workload, concurrency, stats)
+                n = len(workload)
+                stages = "  ".join(
+                    f"{stage} {stats.seconds[stage] / n * 1000:.2f}"
+                    f" ({stats.calls[stage] / n:.1f})"
+                    for stage in STAGES if stats.calls[stage]
+                )
+                print(f"{'on' if use_cache else 'off':<6}{concurrency:>5}"
+                      f"{percentile(latencies, 50) * 1000:>9.2f}"
+                      f"{percentile(latencies, 95) * 1000:>9.2f}"
+                      f"{percentile(latencies, 99) * 1000:>9.2f}"
+                      f"{n / elapsed:>9.1f}   {stages}")
+    finally:
+        table.close()
+        graph.close()
+        pg_manager.close()
+
+
+if __name__ == "__main__":
+    main()
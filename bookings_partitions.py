@@ -0,0 +1,201 @@
+import argparse
+from datetime import datetime
+
+import psycopg2
+
+# Month-partitioned layout for the bookings table.
+#
+# Partitions are by RANGE on starts_at (= lower(timeslot)), one per month.
+# Postgres cannot enforce an exclusion constraint across partitions, so each
+# partition carries its own no_overlap constraint and bookings are not
+# allowed to run past the end of the month they start in. Two overlapping
+# bookings therefore always start in the same month, land in the same
+# partition and still conflict.
+#
+# Queries only need `starts_at >= date_trunc('month', start) AND
+# starts_at < end` next to the usual `timeslot && tsrange(start, end)` to
+# let the planner prune every partition outside the requested window.
+
+PG_DSN = "dbname=meeting_rooms user=postgres password=postgres host=localhost port=5432"
+ARCHIVE_SCHEMA = "bookings_archive"
+
+PARTITIONED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id BIGSERIAL,
+    room_id    TEXT NOT NULL REFERENCES rooms(room_id) ON DELETE CASCADE,
+    timeslot   TSRANGE NOT NULL,
+    starts_at  TIMESTAMP NOT NULL,
+    booked_by  TEXT,
+    title      TEXT,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (booking_id, starts_at),
+    CONSTRAINT starts_at_matches CHECK (starts_at = lower(timeslot)),
+    CONSTRAINT within_one_month CHECK (
+        upper(timeslot) <= date_trunc('month', lower(timeslot))
+                           + interval '1 month'
+    )
+) PARTITION BY RANGE (starts_at);
+"""
+
+
+def is_partitioned(conn):
+    """True if `bookings` is a partitioned table."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class "
+                    "WHERE oid = to_regclass('bookings')")
+        row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def month_start(ts: datetime):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(ts: datetime):
+    ts = month_start(ts)
+    return ts.replace(year=ts.year + 1, month=1) if ts.month == 12 \
+        else ts.replace(month=ts.month + 1)
+
+
+def partition_name(ts: datetime):
+    return f"bookings_y{ts.year}m{ts.month:02d}"
+
+
+def create_schema(conn):
+    with conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        cur.execute(PARTITIONED_SCHEMA)
+
+
+def ensure_partitions(conn, start: datetime, end: datetime):
+    """
+    Creates the monthly partitions (with their no_overlap constraint)
+    covering [start, end). Returns the names of the partitions created.
+    """
+    created = []
+    month = month_start(start)
+    with conn.cursor() as cur:
+        while month < end:
+            name = partition_name(month)
+            cur.execute("SELECT to_regclass(%s)", (name,))
+            if cur.fetchone()[0] is None:
+                cur.execute(
+                    f"CREATE TABLE {name} PARTITION OF bookings "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    (month, next_month(month))
+                )
+                cur.execute(
+                    f"ALTER TABLE {name} ADD CONSTRAINT {name}_no_overlap "
+                    f"EXCLUDE USING gist (room_id WITH =, timeslot WITH &&)"
+                )
+                created.append(name)
+            month = next_month(month)
+    return created
+
+
+def list_partitions(conn):
+    """(name, lower bound) of every attached partition, oldest first."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'bookings'::regclass
+            ORDER BY c.relname
+        """)
+        names = [row[0] for row in cur.fetchall()]
+    return [(name, datetime.strptime(name, "bookings_y%Ym%m"))
+            for name in names]
+
+
+def archive_partitions(conn, before: datetime, drop=False):
+    """
+    Detaches every partition that ends on or before `before`. Detached
+    partitions are moved to the archive schema, or dropped with drop=True.
+    """
+    archived = []
+    with conn.cursor() as cur:
+        if not drop:
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+        for name, lower in list_partitions(conn):
+            if next_month(lower) > before:
+                break
+            cur.execute(f"ALTER TABLE bookings DETACH PARTITION {name}")
+            if drop:
+                cur.execute(f"DROP TABLE {name}")
+            else:
+                cur.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+            archived.append(name)
+    return archived
+
+
+def migrate_from_heap(conn):
+    """
+    Converts the original single-table layout: renames it, creates the
+    partitioned table with partitions for the existing data and copies the
+    rows across. Bookings crossing a month boundary are rejected by the
+    within_one_month check and must be split first.
+    """
+    with conn.cursor() as cur:
+        cur.execute("ALTER TABLE bookings RENAME TO bookings_heap")
+        cur.execute("ALTER TABLE bookings_heap "
+                    "RENAME CONSTRAINT no_overlap TO bookings_heap_no_overlap")
+        create_schema(conn)
+        cur.execute("SELECT min(lower(timeslot)), max(lower(timeslot)) "
+                    "FROM bookings_heap")
+        first, last = cur.fetchone()
+        if first is not None:
+            ensure_partitions(conn, first, next_month(last))
+        cur.execute("""
+            INSERT INTO bookings (booking_id, room_id, timeslot, starts_at,
+                                  booked_by, title, created_at)
+            SELECT booking_id, room_id, timeslot, lower(timeslot), booked_by,
+                   title, created_at
+            FROM bookings_heap
+        """)
+        migrated = cur.rowcount
+        cur.execute("""
+            SELECT setval(pg_get_serial_sequence('bookings', 'booking_id'),
+                          coalesce(max(booking_id), 0) + 1, false)
+            FROM bookings
+        """)
+        return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("create", help="create the partitioned bookings table")
+    sub.add_parser("migrate", help="convert an existing heap bookings table")
+    ensure = sub.add_parser("ensure", help="create monthly partitions")
+    ensure.add_argument("--from", dest="start", required=True,
+                        help="YYYY-MM")
+    ensure.add_argument("--to", dest="end", required=True,
+                        help="YYYY-MM (exclusive)")
+    archive = sub.add_parser("archive", help="detach old partitions")
+    archive.add_argument("--before", required=True, help="YYYY-MM")
+    archive.add_argument("--drop", action="store_true")
+    args = parser.parse_args()
+
+    with psycopg2.connect(PG_DSN) as conn:
+        if args.command == "create":
+            create_schema(conn)
+            print("Created partitioned bookings table.")
+        elif args.command == "migrate":
+            print(f"Migrated {migrate_from_heap(conn)} bookings.")
+        elif args.command == "ensure":
+            created = ensure_partitions(
+                conn, datetime.strptime(args.start, "%Y-%m"),
+                datetime.strptime(args.end, "%Y-%m")
+            )
+            print(f"Created {len(created)} partitions: {', '.join(created)}")
+        elif args.command == "archive":
+            archived = archive_partitions(
+                conn, datetime.strptime(args.before, "%Y-%m"), args.drop
+            )
+            action = "Dropped" if args.drop else f"Moved to {ARCHIVE_SCHEMA}:"
+            print(f"{action} {', '.join(archived) or 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
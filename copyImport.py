@@ -0,0 +1,220 @@
+import argparse
+import io
+import json
+import time
+
+import psycopg2
+
+from bookings_partitions import ensure_partitions, is_partitioned, next_month
+
+# Streaming importer for rooms and bookings based on COPY FROM STDIN.
+#
+# Inputs may be a JSON array (en-map.json / bookings.json) or JSON Lines,
+# one object per line. Records are decoded and written to Postgres one at a
+# time, so memory stays flat no matter how many rows the file holds.
+#   - rooms go through a temporary staging table, keeping importData.py's
+#     ON CONFLICT (room_id) DO NOTHING behaviour
+#   - bookings are copied straight into bookings with timeslot as tsrange
+#     text; a partitioned bookings table goes through staging too, so the
+#     monthly partitions can be created before the rows are moved
+#
+#   python copyImport.py --rooms en-map.json --bookings bookings.jsonl
+
+PG_DSN = "dbname=meeting_rooms user=postgres password=postgres host=localhost port=5432"
+READ_SIZE = 1 << 16
+
+
+def iter_records(path):
+    """Yields the objects of a JSON array or JSON Lines file, one by one."""
+    with open(path) as f:
+        head = f.read(READ_SIZE)
+        if head.lstrip().startswith("["):
+            yield from _iter_json_array(f, head)
+            return
+        buffer = head
+        while True:
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+        if buffer.strip():
+            yield json.loads(buffer)
+
+
+def _iter_json_array(f, buffer):
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    while True:
+        # Skip separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                raise ValueError("unterminated JSON array")
+            buffer, pos = chunk, 0
+        if buffer[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield record
+        pos = end
+
+
+def copy_value(value):
+    """Formats one value for COPY's text format."""
+    if value is None:
+        return r"\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_line(*values):
+    return "\t".join(copy_value(v) for v in values) + "\n"
+
+
+class CopyStream(io.TextIOBase):
+    """
+    File-like wrapper over an iterator of COPY lines, for copy_expert().
+    Counts the lines it hands out so callers can report throughput.
+    """
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ""
+        self.rows = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts, length = [self._buffer], len(self._buffer)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+            self.rows += 1
+        data = "".join(parts)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    readline = read
+
+
+def room_lines(records):
+    for r in records:
+        yield copy_line(
+            r["id"], r["name"], r.get("level"), r["location"]["grid"],
+            r.get("capacity"), r["type"].replace(" ", "")
+        )
+
+
+def booking_lines(records, with_starts_at=False):
+    for b in records:
+        timeslot = f"[\"{b['start']}\",\"{b['end']}\")"
+        if with_starts_at:
+            yield copy_line(b["room_id"], timeslot, b["start"],
+                            b["booked_by"], b.get("title", ""))
+        else:
+            yield copy_line(b["room_id"], timeslot, b["booked_by"],
+                            b.get("title", ""))
+
+
+def copy_rooms(conn, records):
+    stream = CopyStream(room_lines(records))
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE rooms_stage (LIKE rooms INCLUDING DEFAULTS)
+            ON COMMIT DROP
+        """)
+        cur.copy_expert(
+            "COPY rooms_stage (room_id, name, level, grid, capacity, type) "
+            "FROM STDIN", stream, size=READ_SIZE
+        )
+        cur.execute("""
+            INSERT INTO rooms (room_id, name, level, grid, capacity, type)
+            SELECT room_id, name, level, grid, capacity, type FROM rooms_stage
+            ON CONFLICT (room_id) DO NOTHING
+        """)
+    return stream.rows
+
+
+def copy_bookings(conn, records):
+    if is_partitioned(conn):
+        return _copy_bookings_partitioned(conn, records)
+    stream = CopyStream(booking_lines(records))
+    with conn.cursor() as cur:
+        cur.copy_expert(
+            "COPY bookings (room_id, timeslot, booked_by, title) FROM STDIN",
+            stream, size=READ_SIZE
+        )
+    return stream.rows
+
+
+def _copy_bookings_partitioned(conn, records):
+    stream = CopyStream(booking_lines(records, with_starts_at=True))
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE bookings_stage (
+                room_id TEXT, timeslot TSRANGE, starts_at TIMESTAMP,
+                booked_by TEXT, title TEXT
+            ) ON COMMIT DROP
+        """)
+        cur.copy_expert(
+            "COPY bookings_stage (room_id, timeslot, starts_at, booked_by, "
+            "title) FROM STDIN", stream, size=READ_SIZE
+        )
+        cur.execute("SELECT min(starts_at), max(starts_at) FROM bookings_stage")
+        first, last = cur.fetchone()
+        if first is not None:
+            ensure_partitions(conn, first, next_month(last))
+        # Sorted so consecutive rows go to the same partition
+        cur.execute("""
+            INSERT INTO bookings (room_id, timeslot, starts_at, booked_by,
+                                  title)
+            SELECT room_id, timeslot, starts_at, booked_by, title
+            FROM bookings_stage
+            ORDER BY starts_at
+        """)
+    return stream.rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", help="rooms JSON / JSON Lines file")
+    parser.add_argument("--bookings", help="bookings JSON / JSON Lines file")
+    parser.add_argument("--dsn", default=PG_DSN)
+    args = parser.parse_args()
+
+    with psycopg2.connect(args.dsn) as conn:
+        for label, path, loader in (("rooms", args.rooms, copy_rooms),
+                                    ("bookings", args.bookings, copy_bookings)):
+            if not path:
+                continue
+            began = time.perf_counter()
+            rows = loader(conn, iter_records(path))
+            elapsed = time.perf_counter() - began
+            print(f"Copied {rows} {label} in {elapsed:.2f}s "
+                  f"({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+        conn.commit()
+        print("✅ Data imported.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from array import array
+
+from neo4j import GraphDatabase
+
+# Precomputed grid cell -> bookable room distances.
+#
+# The table covers every cell in the bounding box of the map's grids (for
+# en-map.json that is A1..W31), so any participant location such as "G2"
+# resolves to a row with one array lookup. Two metrics are stored:
+#   euclidean - the same grid distance the recommender computes on the fly
+#   walking   - shortest path over :NEAR / :CONNECTS_TO edges in Neo4j,
+#               entering the graph at the closest mapped location
+#
+# File layout (little endian):
+#   MAGIC | uint32 header length | JSON header | padding to 4 bytes |
+#   float32[metric][cell][room]
+# The header records the sha256 of the map file; load_or_build() rebuilds
+# the table whenever the map no longer matches.
+
+MAGIC = b"WFDT1\0"
+METRICS = ("euclidean", "walking")
+BOOKABLE_TYPE = "ConferenceRoom"
+STAIR_COST = 3.0  # grid units charged for a :CONNECTS_TO hop between floors
+
+
+def _col_to_num(letters):
+    result = 0
+    for c in letters:
+        result = result * 26 + (ord(c.upper()) - ord('A') + 1)
+    return result
+
+
+def _num_to_col(num):
+    letters = ""
+    while num:
+        num, rem = divmod(num - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def parse_grid(grid):
+    """'F8' -> (6, 8); None for missing or malformed grids."""
+    match = re.match(r"([A-Z]+)(\d+)", grid or "")
+    if not match:
+        return None
+    return _col_to_num(match.group(1)), int(match.group(2))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fetch_walking_graph(driver, database="neo4j"):
+    """Location grids and an undirected weighted adjacency list from Neo4j."""
+    with driver.session(database=database) as session:
+        nodes = session.run(
+            "MATCH (n:Location) WHERE n.grid IS NOT NULL "
+            "RETURN n.id AS id, n.grid AS grid"
+        ).data()
+        edges = session.run(
+            "MATCH (a:Location)-[r:NEAR|CONNECTS_TO]->(b:Location) "
+            "RETURN a.id AS a, b.id AS b, type(r) AS type, "
+            "r.distance AS distance"
+        ).data()
+
+    adjacency = {}
+    for edge in edges:
+        if edge["type"] == "CONNECTS_TO" or edge["distance"] is None:
+            weight = STAIR_COST
+        else:
+            weight = float(edge["distance"])
+        adjacency.setdefault(edge["a"], []).append((edge["b"], weight))
+        adjacency.setdefault(edge["b"], []).append((edge["a"], weight))
+    grids = {n["id"]: parse_grid(n["grid"]) for n in nodes}
+    return {k: v for k, v in grids.items() if v}, adjacency
+
+
+def _walking_row(cell_xy, node_grids, adjacency, room_ids):
+    """
+    Dijkstra from the mapped location(s) closest to the cell, each starting
+    at the straight-line distance from the cell. Only the closest ones are
+    seeded; seeding every node would let the walk skip the graph entirely.
+    """
+    offsets = {node_id: math.hypot(cell_xy[0] - x, cell_xy[1] - y)
+               for node_id, (x, y) in node_grids.items()}
+    if not offsets:
+        return [math.nan] * len(room_ids)
+    nearest = min(offsets.values())
+    best = {node_id: cost for node_id, cost in offsets.items()
+            if cost == nearest}
+    heap = [(cost, node_id) for node_id, cost in best.items()]
+    heapq.heapify(heap)
+    while heap:
+        cost, node_id = heapq.heappop(heap)
+        if cost > best[node_id]:
+            continue
+        for neighbour, weight in adjacency.get(node_id, ()):
+            new_cost = cost + weight
+            if new_cost < best.get(neighbour, math.inf):
+                best[neighbour] = new_cost
+                heapq.heappush(heap, (new_cost, neighbour))
+    return [best.get(room_id, math.nan) for room_id in room_ids]
+
+
+def build_distance_table(map_path, out_path, driver=None, database="neo4j"):
+    """
+    Builds the table for `map_path` and writes it to `out_path`.
+    Without a Neo4j driver the walking metric is left as NaN.
+    """
+    with open(map_path) as f:
+        locations = json.load(f)
+
+    rooms = [
+        loc for loc in locations
+        if loc["type"].replace(" ", "") == BOOKABLE_TYPE
+        and parse_grid(loc["location"].get("grid"))
+    ]
+    room_ids = [room["id"] for room in rooms]
+    room_xy = [parse_grid(room["location"]["grid"]) for room in rooms]
+
+    points = [xy for xy in (parse_grid(loc["location"].get("grid"))
+                            for loc in locations) if xy]
+    max_col = max(x for x, _ in points)
+    max_row = max(y for _, y in points)
+    cells = [(x, y) for x in range(1, max_col + 1)
+             for y in range(1, max_row + 1)]
+
+    values = array("f")
+    for cx, cy in cells:
+        values.extend(math.hypot(cx - rx, cy - ry) for rx, ry in room_xy)
+
+    if driver is not None:
+        node_grids, adjacency = _fetch_walking_graph(driver, database)
+        for cell in cells:
+            values.extend(_walking_row(cell, node_grids, adjacency, room_ids))
+    else:
+        values.extend([math.nan] * (len(cells) * len(room_ids)))
+
+    header = json.dumps({
+        "map_sha256": file_sha256(map_path),
+        "metrics": list(METRICS),
+        "cells": [f"{_num_to_col(x)}{y}" for x, y in cells],
+        "rooms": room_ids,
+    }).encode()
+    padding = -(len(MAGIC) + 4 + len(header)) % 4
+
+    if values.itemsize != 4:
+        raise RuntimeError("float32 arrays are required for the table format")
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        values.byteswap()
+
+    # Unique temp file next to the target, so concurrent builds never
+    # write into each other's file, then an atomic swap so readers never
+    # map a half-written table
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(out_path)),
+        prefix=os.path.basename(out_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(b"\0" * padding)
+            values.tofile(f)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(cells), len(room_ids)
+
+
+class _TableData:
+    """
+    One mapped generation of the table. Never changed after creation: a
+    rebuild maps a new generation and swaps the reference, and the old
+    mmap is closed by garbage collection once no reader holds it.
+    """
+    __slots__ = ("mmap", "values", "map_sha256", "cell_index", "room_index",
+                 "metric_index", "n_cells", "n_rooms")
+
+    def __init__(self, table_path):
+        with open(table_path, "rb") as f:
+            header, data_offset = DistanceTable._read_header(f)
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.values = memoryview(self.mmap)[data_offset:].cast("f")
+        self.map_sha256 = header["map_sha256"]
+        self.cell_index = {cell: i for i, cell in enumerate(header["cells"])}
+        self.room_index = {room: i for i, room in enumerate(header["rooms"])}
+        self.metric_index = {m: i for i, m in enumerate(header["metrics"])}
+        self.n_cells = len(self.cell_index)
+        self.n_rooms = len(self.room_index)
+
+    def row_offset(self, cell, metric):
+        cell_idx = self.cell_index.get(cell)
+        if cell_idx is None:
+            return None
+        metric_idx = self.metric_index[metric]
+        return (metric_idx * self.n_cells + cell_idx) * self.n_rooms
+
+
+class DistanceTable:
+    """
+    Read-only, memory-mapped view of a table built by build_distance_table.
+    Lookups are plain index arithmetic into a float32 buffer.
+
+    Safe to share between threads: ensure_fresh() rebuilds under a lock and
+    publishes the new mapping as one object, and each lookup reads that
+    object once, so readers never see a half-swapped or closed table.
+    """
+    def __init__(self, table_path, map_path=None, driver=None,
+                 database="neo4j"):
+        self.table_path = table_path
+        self.map_path = map_path
+        self.driver = driver
+        self.database = database
+        self._lock = threading.Lock()
+        self._map_stat = None
+        self._data = None
+        self._load()
+
+    @classmethod
+    def load_or_build(cls, map_path, table_path, driver=None,
+                      database="neo4j"):
+        """Opens the table, (re)building it first if it is missing or stale."""
+        if not cls._matches_map(table_path, map_path):
+            build_distance_table(map_path, table_path, driver, database)
+        return cls(table_path, map_path, driver, database)
+
+    @staticmethod
+    def _read_header(f):
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a distance table file")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+        offset = len(MAGIC) + 4 + length
+        return header, offset + (-offset % 4)
+
+    @classmethod
+    def _matches_map(cls, table_path, map_path):
+        try:
+            with open(table_path, "rb") as f:
+                header, _ = cls._read_header(f)
+        except (OSError, ValueError):
+            return False
+        return header["map_sha256"] == file_sha256(map_path)
+
+    def _load(self):
+        # Stat before mapping: a map edited meanwhile is caught next time
+        map_stat = self._stat(self.map_path) if self.map_path else None
+        self._data = _TableData(self.table_path)
+        self._map_stat = map_stat
+
+    @property
+    def map_sha256(self):
+        return self._data.map_sha256
+
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def ensure_fresh(self):
+        """
+        Cheap staleness check (one stat call). If the map file changed and
+        its content no longer matches, the table is rebuilt and remapped;
+        concurrent callers wait for that one rebuild instead of repeating it.
+        """
+        if not self.map_path or self._stat(self.map_path) == self._map_stat:
+            return
+        with self._lock:
+            if self._stat(self.map_path) == self._map_stat:
+                return  # another thread refreshed it while we waited
+            if file_sha256(self.map_path) != self._data.map_sha256:
+                build_distance_table(self.map_path, self.table_path,
+                                     self.driver, self.database)
+            self._load()
+
+    def row_offset(self, cell, metric="euclidean"):
+        """Start of the room row for a grid cell, or None if not covered."""
+        return self._data.row_offset(cell, metric)
+
+    def covers(self, cell, room_id):
+        """True if both the grid cell and the room are in the table."""
+        data = self._data
+        return cell in data.cell_index and room_id in data.room_index
+
+    def distance(self, cell, room_id, metric="euclidean"):
+        """Distance from a grid cell to a room; None if unknown."""
+        data = self._data
+        base = data.row_offset(cell, metric)
+        room_idx = data.room_index.get(room_id)
+        if base is None or room_idx is None:
+            return None
+        value = data.values[base + room_idx]
+        return None if math.isnan(value) else value
+
+    def close(self):
+        data, self._data = self._data, None
+        data.values.release()
+        data.mmap.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", default="en-map.json")
+    parser.add_argument("--out", default="distance_table.bin")
+    parser.add_argument("--no-walking", action="store_true",
+                        help="skip Neo4j and only store euclidean distances")
+    parser.add_argument("--uri", default="neo4j://localhost:7687")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default="graphrag")
+    args = parser.parse_args()
+
+    driver = None
+    if not args.no_walking:
+        driver = GraphDatabase.driver(args.uri, auth=(args.user, args.password))
+    try:
+        n_cells, n_rooms = build_distance_table(args.map, args.out, driver)
+    finally:
+        if driver is not None:
+            driver.close()
+    print(f"Wrote {args.out}: {n_cells} cells x {n_rooms} rooms "
+          f"x {len(METRICS)} metrics.")
@@ -1,6 +1,7 @@
 import json
 import re
 from neo4j import GraphDatabase
+from location_catalog import stamp_graph_version
 
 # --- STEP 1: NEO4J DATABASE CONFIGURATION ---
 # Replace with your Neo4j database credentials.
@@ -14,6 +15,36 @@ AUTH = ("neo4j", "graphrag") # Default user is 'neo4j'
 # Please create this file in the same directory as this script and
 # populate it with the JSON array of location data.
 
+def grid_distance(grid1, grid2):
+    """
+    A simple function to estimate distance based on the grid coordinates.
+    Example: 'F8' -> ('F', 8). Module-level so the recommenders can score
+    rooms without a graph connection.
+    """
+    try:
+        # Use regex to split letters and numbers
+        match1 = re.match(r"([A-Z]+)(\d+)", grid1)
+        match2 = re.match(r"([A-Z]+)(\d+)", grid2)
+
+        if not match1 or not match2:
+            return None
+
+        # Letter part (A=0, B=1, etc.)
+        char_code1 = ord(match1.group(1).upper()) - ord('A')
+        char_code2 = ord(match2.group(1).upper()) - ord('A')
+
+        # Number part
+        num1 = int(match1.group(2))
+        num2 = int(match2.group(2))
+
+        # Calculate Euclidean distance
+        distance = ((char_code1 - char_code2)**2 + (num1 - num2)**2)**0.5
+        return distance
+    except (TypeError, ValueError):
+        # Handle cases where grid is null or malformed
+        return None
+
+
 class EndeavorGraph:
     """
     A class to manage the creation and querying of the Endeavor building graph.
@@ -95,6 +126,8 @@ class EndeavorGraph:
             nodes = session.execute_read(self._get_all_location_nodes)
             self._create_near_relationships(nodes)
             print("Created :NEAR relationships.")
+            stamp_graph_version(session)
+            print("Stamped new graph version.")
 
     @staticmethod
     def _create_located_on_relationships(tx):
@@ -153,32 +186,8 @@ class EndeavorGraph:
         tx.run(query, id1=id1, id2=id2, distance=distance)
 
     def _calculate_grid_distance(self, grid1, grid2):
-        """
-        A simple function to estimate distance based on the grid coordinates.
-        Example: 'F8' -> ('F', 8)
-        """
-        try:
-            # Use regex to split letters and numbers
-            match1 = re.match(r"([A-Z]+)(\d+)", grid1)
-            match2 = re.match(r"([A-Z]+)(\d+)", grid2)
-
-            if not match1 or not match2:
-                return None
-
-            # Letter part (A=0, B=1, etc.)
-            char_code1 = ord(match1.group(1).upper()) - ord('A')
-            char_code2 = ord(match2.group(1).upper()) - ord('A')
-
-            # Number part
-            num1 = int(match1.group(2))
-            num2 = int(match2.group(2))
-
-            # Calculate Euclidean distance
-            distance = ((char_code1 - char_code2)**2 + (num1 - num2)**2)**0.5
-            return distance
-        except (TypeError, ValueError):
-            # Handle cases where grid is null or malformed
-            return None
+        """See grid_distance()."""
+        return grid_distance(grid1, grid2)
 
 
     # --- STEP 4: QUERY THE GRAPH ---
@@ -1,73 +1,290 @@
+import asyncio
+import logging
 import re
-from neo4j import GraphDatabase
-from openai import OpenAI
+import httpx
+import tracing
+from neo4j import AsyncGraphDatabase, GraphDatabase, Query
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 import math
 import os
-from fastmcp import FastMCP
+import uuid
+from collections import OrderedDict, namedtuple
+from fastmcp import Context, FastMCP
+from starlette.responses import PlainTextResponse
+from json_stream import JSONObjectExtractor, extract_json_object
+from llm_cache import LLMCache
+from llm_router import AsyncLLMRouter, load_routes
+from location_catalog import LocationCatalog, parse_grid
+from location_parser import UnknownLocation
+
+# Failures only; the request/parse/route spans (tracing.py) record the rest
+log = logging.getLogger("wayfinder.rag")
+
+# Prompts shared by EndeavorRAG and AsyncEndeavorRAG (str.format templates)
+PARSE_PROMPT = """
+            You are a helpful assistant that extracts locations from natural language navigation queries.
+
+            Extract the start and end locations from the following sentence:
+            "{text}"
+
+            Return a JSON object like this: {{"start": "Room A", "end": "Room B"}}
+        """
+POLISH_PROMPT = """
+            You are a navigation assistant. Rewrite the following step-by-step walking directions as friendly, natural English. Keep every step, distance and level change:
+
+            {directions}
+        """
+
+# Bump when the parse prompt changes so cached answers are not reused
+PARSE_PROMPT_VERSION = "parse-v1"
+
+# Streaming model used when no LLM router is configured
+QWEN_MODEL = "qwen/qwen3-235b-a22b"
+QWEN_PARAMS = dict(
+    temperature=0.2,
+    top_p=0.7,
+    max_tokens=1024,
+    extra_body={"chat_template_kwargs": {"thinking": True}},
+)
+
+# Raw parse of a query, before the names are resolved onto Locations
+# (AsyncEndeavorRAG.parse_user_query, EndeavorRAG._parse_query). `model` is
+# the LLM that extracted the names, or
+# None when the local parser or the cache answered; resolve_parsed() caches
+# an LLM answer only after both names resolve.
+ParsedQuery = namedtuple("ParsedQuery", "start end model")
+
+# Shortest route with everything needed to render it, in one round trip
+ROUTE_QUERY = """
+MATCH (start:Location {name: $start}), (end:Location {name: $end})
+WITH start, end LIMIT 1
+MATCH path = shortestPath((start)-[:NEAR|CONNECTS_TO*]-(end))
+RETURN [n IN nodes(path) | n {.id, .name, .grid, .level}] AS nodes,
+       [r IN relationships(path) | [type(r), r.distance]] AS edges
+"""
+
+def route_from_record(record):
+    """
+    Ordered route nodes: id, name, grid, level, parsed pos, plus the type
+    and weight of the edge arriving at the node (None for the start).
+    """
+    if record is None:
+        return []
+    route = []
+    edges = [(None, None)] + record["edges"]
+    for node, (via, weight) in zip(record["nodes"], edges):
+        node["pos"] = parse_grid(node["grid"])
+        node["via"] = via
+        node["distance"] = weight
+        route.append(node)
+    return route
+
+# Connection pool sizes for a long-lived server process
+NEO4J_POOL_SIZE = int(os.getenv("WAYFINDER_NEO4J_POOL", "50"))
+LLM_MAX_CONNECTIONS = int(os.getenv("WAYFINDER_LLM_CONNECTIONS", "20"))
+
+# Per-request time limits for the async pipeline (seconds)
+REQUEST_TIMEOUT = float(os.getenv("WAYFINDER_REQUEST_TIMEOUT", "30"))
+POLISH_TIMEOUT = float(os.getenv("WAYFINDER_POLISH_TIMEOUT", "90"))
+NEO4J_QUERY_TIMEOUT = float(os.getenv("WAYFINDER_NEO4J_TIMEOUT", "5"))
+
+def _neo4j_pool_options(pool_size):
+    return dict(
+        max_connection_pool_size=pool_size,
+        connection_acquisition_timeout=10.0,
+        max_connection_lifetime=30 * 60,
+        liveness_check_timeout=60.0,
+        keep_alive=True,
+    )
+
+def _llm_http_options(max_connections):
+    return dict(
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections,
+                            keepalive_expiry=120.0),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+
+def make_neo4j_driver(uri, user, password, pool_size=NEO4J_POOL_SIZE):
+    """Neo4j driver tuned to be created once and shared by every request."""
+    return GraphDatabase.driver(uri, auth=(user, password),
+                                **_neo4j_pool_options(pool_size))
+
+def make_async_neo4j_driver(uri, user, password, pool_size=NEO4J_POOL_SIZE):
+    """Async counterpart of make_neo4j_driver; bound to the running event loop."""
+    return AsyncGraphDatabase.driver(uri, auth=(user, password),
+                                     **_neo4j_pool_options(pool_size))
+
+def make_llm_client(openai_api_key, base_url=None,
+                    max_connections=LLM_MAX_CONNECTIONS):
+    """OpenAI client over a keep-alive HTTP pool so TLS setup is paid once."""
+    return OpenAI(
+        api_key=openai_api_key,
+        base_url=base_url if base_url else "https://api.openai.com/v1",  # fallback to OpenAI if not NVIDIA
+        http_client=DefaultHttpxClient(**_llm_http_options(max_connections)),
+    )
+
+def make_async_llm_client(openai_api_key, base_url=None,
+                          max_connections=LLM_MAX_CONNECTIONS):
+    """Async counterpart of make_llm_client."""
+    return AsyncOpenAI(
+        api_key=openai_api_key,
+        base_url=base_url if base_url else "https://api.openai.com/v1",
+        http_client=DefaultAsyncHttpxClient(**_llm_http_options(max_connections)),
+    )
+
+def cached_parse(cache, text, *models):
+    """
+    A cached ParsedQuery for text from the first of `models` that has one,
+    or None. Blocking (SQLite).
+    """
+    if cache is None:
+        return None
+    for model in models:
+        locs = cache.get(text, model, PARSE_PROMPT_VERSION)
+        if locs:
+            return ParsedQuery(locs["start"], locs["end"], None)
+    return None
+
+def store_parse(cache, text, model, start, end):
+    """Caches the resolved names for text. Blocking (SQLite)."""
+    if cache is not None:
+        cache.set(text, model, PARSE_PROMPT_VERSION,
+                  {"start": start, "end": end})
 
 class EndeavorRAG:
-    def __init__(self, uri, user, password, openai_api_key, base_url=None):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.llm = OpenAI(
-            api_key=openai_api_key,
-            base_url=base_url if base_url else "https://api.openai.com/v1"  # fallback to OpenAI if not NVIDIA
-        )
+    def __init__(self, uri, user, password, openai_api_key, base_url=None,
+                 cache: LLMCache = None, driver=None, llm=None):
+        # A driver / client passed in is shared and stays open on close()
+        self._owns_driver = driver is None
+        self._owns_llm = llm is None
+        self.driver = driver or make_neo4j_driver(uri, user, password)
+        self.llm = llm or make_llm_client(openai_api_key, base_url)
+        self._catalog = None
+        self.cache = cache
 
     def close(self):
-        self.driver.close()
+        if self._owns_driver:
+            self.driver.close()
+        if self._owns_llm:
+            self.llm.close()
+
+    @property
+    def catalog(self):
+        """
+        In-memory name/grid/level of every Location, loaded on first use
+        and reloaded when the graph version changes.
+        """
+        if self._catalog is None:
+            self._catalog = LocationCatalog.load(self.driver)
+        else:
+            self._catalog = self._catalog.refresh(self.driver)
+        return self._catalog
+
+    @property
+    def location_index(self):
+        """Index of all Location names, rebuilt with the catalog."""
+        return self.catalog.index
+
+    def resolve_locations(self, start, end):
+        """
+        Maps names as the LLM wrote them ("Shannon's Pantry") onto Location
+        names ("Shannon's Pantry/Bar") in-process, before any route query.
+        Raises UnknownLocation with suggestions instead of routing nowhere.
+        """
+        index = self.location_index
+        return (index.lookup(start) if start is not None else None,
+                index.lookup(end))
+
+    def resolve_parsed(self, text, parsed):
+        """
+        resolve_locations for a ParsedQuery. A fresh LLM answer
+        is cached (as the resolved names) only once both names resolve, so
+        an extraction that led to UnknownLocation is never replayed.
+        """
+        start, end = self.resolve_locations(parsed.start, parsed.end)
+        if parsed.model is not None:
+            store_parse(self.cache, text, parsed.model, start, end)
+        return start, end
+
+    def parse_user_query_fast(self, text):
+        """
+        Local, deterministic parse. Returns (start, end), (None, end) for
+        "where is X" questions, or None if the LLM is needed.
+        """
+        return self.location_index.parse(text)
+
+    def resolve_user_query(self, text, use_openai=False):
+        """
+        Parses text and resolves both names onto Locations, returning
+        (start, end). This is the path that caches LLM answers; raises
+        UnknownLocation like resolve_locations.
+        """
+        parse = self._parse_query_with_openai if use_openai else self._parse_query
+        return self.resolve_parsed(text, parse(text))
 
     def parse_user_query_with_openai(self, text):
         """
         Use LLM to extract start and end locations from a natural language query.
+        Returns (start, end) as written; see resolve_user_query.
         """
-        prompt = f"""
-            You are a helpful assistant that extracts locations from natural language navigation queries.
-
-            Extract the start and end locations from the following sentence:
-            "{text}"
+        return tuple(self._parse_query_with_openai(text)[:2])
 
-            Return a JSON object like this: {{"start": "Room A", "end": "Room B"}}
-            """
+    def parse_user_query(self, text):
+        """
+        Extracts (start, end) from text, locally when possible and with the
+        streaming LLM otherwise. Names come back as written; see
+        resolve_user_query.
+        """
+        return tuple(self._parse_query(text)[:2])
+
+    def _parse_query_with_openai(self, text):
+        fast = self.parse_user_query_fast(text)
+        if fast is not None:
+            return ParsedQuery(*fast, None)
+        cached = cached_parse(self.cache, text, "gpt-4")
+        if cached is not None:
+            return cached
+        prompt = PARSE_PROMPT.format(text=text)
         response = self.llm.chat.completions.create(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}]
         )
         reply = response.choices[0].message.content
-        match = re.search(r'\{.*?\}', reply, re.DOTALL)
-        if match:
-            locs = eval(match.group())  # Simple JSON-like extraction
-            return locs['start'], locs['end']
+        locs = extract_json_object(reply)
+        if locs:
+            return ParsedQuery(locs['start'], locs['end'], "gpt-4")
         raise ValueError("Could not parse locations from LLM response")
 
-    def parse_user_query(self, text):
-        prompt = f"""
-            You are a helpful assistant that extracts locations from natural language navigation queries.
-
-            Extract the start and end locations from the following sentence:
-            "{text}"
-
-            Return a JSON object like this: {{"start": "Room A", "end": "Room B"}}
-        """
+    def _parse_query(self, text):
+        fast = self.parse_user_query_fast(text)
+        if fast is not None:
+            return ParsedQuery(*fast, None)
+        cached = cached_parse(self.cache, text, QWEN_MODEL)
+        if cached is not None:
+            return cached
+        prompt = PARSE_PROMPT.format(text=text)
         response = self.llm.chat.completions.create(
-            model="qwen/qwen3-235b-a22b",
+            model=QWEN_MODEL,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            top_p=0.7,
-            max_tokens=1024,
             stream=True,
-            extra_body={"chat_template_kwargs": {"thinking": True}}
+            **QWEN_PARAMS
         )
 
-        output = ""
-        for chunk in response:
-            content = getattr(chunk.choices[0].delta, "content", "")
-            if content:
-                output += content
-
-        match = re.search(r'\{.*?\}', output, re.DOTALL)
-        if match:
-            locs = eval(match.group())
-            return locs['start'], locs['end']
+        # Stop reading (and paying for tokens) as soon as the answer closes
+        extractor = JSONObjectExtractor()
+        locs = None
+        try:
+            for chunk in response:
+                content = getattr(chunk.choices[0].delta, "content", "")
+                if content and extractor.feed(content):
+                    locs = extractor.result
+                    break
+        finally:
+            response.close()
+
+        if locs:
+            return ParsedQuery(locs['start'], locs['end'], QWEN_MODEL)
         raise ValueError("Could not parse locations from LLM response")
 
     def get_shortest_path_gds(self, start_name, end_name):
@@ -97,6 +314,20 @@ class EndeavorRAG:
             record = result.single()
             return record["names"] if record else []
 
+    def get_route(self, start_name, end_name):
+        """Like get_shortest_path, but returns full route nodes (ROUTE_QUERY)."""
+        with self.driver.session(database="neo4j") as session:
+            record = session.run(ROUTE_QUERY, start=start_name, end=end_name).single()
+            return route_from_record(record)
+
+    def render_route(self, route):
+        """Local directions for a get_route result; no further lookups."""
+        if not route:
+            return "Sorry, I couldn't find a valid path."
+        if len(route) == 1:
+            return f"You are already at {route[0]['name']}."
+        return self.render_directions_local(route)
+
     def render_path_to_instruction0(self, path):
         if not path:
             return "Sorry, I couldn't find a valid path."
@@ -141,42 +372,44 @@ class EndeavorRAG:
         )
         return response.choices[0].message.content.strip()
 
-    def render_path_to_instruction(self, path):
+    def render_path_to_instruction(self, path, polish=False):
+        """
+        Step-by-step directions for a path of location names, rendered
+        locally from the path geometry. With polish=True the text is also
+        rewritten by the LLM (slow; the MCP server polishes in the
+        background instead).
+        """
         if not path:
             return "Sorry, I couldn't find a valid path."
         if len(path) == 1:
             return f"You are already at {path[0]}."
 
-        node_infos = self.get_node_details(path)
+        node_infos = self.catalog.node_infos(path)
         if not node_infos:
             return "No valid path found or coordinates missing."
 
-        path_description = self.generate_directions(node_infos)
+        directions = self.render_directions_local(node_infos)
+        return self.polish_instructions(directions) if polish else directions
 
-        prompt = f"""
-            You are a navigation assistant. Convert the following ordered list of locations into step-by-step natural English walking directions:
-
-            Path: {path_description}
-        """
+    def polish_instructions(self, directions):
+        """Rewrites locally rendered directions into friendlier prose."""
+        return "".join(self.stream_polished_instructions(directions)).strip()
 
+    def stream_polished_instructions(self, directions):
+        """Yields the polished directions token by token as the LLM streams."""
+        prompt = POLISH_PROMPT.format(directions=directions)
         response = self.llm.chat.completions.create(
-            model="qwen/qwen3-235b-a22b",
+            model=QWEN_MODEL,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            top_p=0.7,
-            max_tokens=1024,
             stream=True,
-            extra_body={"chat_template_kwargs": {"thinking": True}}
+            **QWEN_PARAMS
         )
 
-        output = ""
         for chunk in response:
             content = getattr(chunk.choices[0].delta, "content", "")
             if content:
-                output += content
+                yield content
 
-        return output.strip()
-    
     def get_node_details(self, path_names):
         with self.driver.session(database="neo4j") as session:
             result = session.run("""
@@ -186,7 +419,17 @@ class EndeavorRAG:
             """, names=path_names)
             return [record.data() for record in result]
     
+    def describe_location(self, name):
+        node_infos = self.catalog.node_infos([name])
+        if not node_infos:
+            return f"Sorry, I couldn't find {name}."
+        info = node_infos[0]
+        return f"{info['name']} is on Level {info['level']}, grid {info['grid']}."
+
     def parse_grid(self, grid):
+        """'AB12' -> (28, 12); None for a missing or malformed grid."""
+        if not grid:
+            return None
         match = re.match(r"([A-Z]+)(\d+)", grid)
         if not match:
             return None
@@ -201,8 +444,8 @@ class EndeavorRAG:
         steps = []
         for i in range(len(node_infos) - 1):
             cur, nxt = node_infos[i], node_infos[i+1]
-            pos1 = self.parse_grid(cur['grid'])
-            pos2 = self.parse_grid(nxt['grid'])
+            pos1 = self.parse_grid(cur.get('grid'))
+            pos2 = self.parse_grid(nxt.get('grid'))
             if not pos1 or not pos2:
                 continue
             dx, dy = pos2[0] - pos1[0], pos2[1] - pos1[1]
@@ -214,6 +457,68 @@ class EndeavorRAG:
             steps.append(step)
         return "\n".join(steps)
 
+    def render_directions_local(self, node_infos):
+        """
+        Numbered walking directions built from the path geometry alone:
+        consecutive hops in the same direction on the same level are merged
+        into one step, and level changes become explicit stair steps.
+        """
+        if len(node_infos) < 2:
+            return "You are already at the destination."
+
+        first, last = node_infos[0], node_infos[-1]
+        where = f"Level {first['level']}"
+        if first.get('grid'):
+            where += f", grid {first['grid']}"
+        steps = [f"Start at '{first['name']}' ({where})."]
+        leg = None  # [direction, meters, passed names, end name]
+
+        def flush():
+            if leg is None:
+                return
+            direction, meters, passed, end = leg
+            step = f"Head {direction or 'on'} for about {round(meters)} meters"
+            if passed:
+                step += ", passing " + ", ".join(f"'{n}'" for n in passed[:3])
+            steps.append(step + f", to '{end}'.")
+
+        for cur, nxt in zip(node_infos, node_infos[1:]):
+            if cur['level'] != nxt['level']:
+                flush()
+                leg = None
+                via = "stairs" if "stair" in cur['name'].lower() \
+                    else f"'{cur['name']}'"
+                steps.append(f"Take the {via} to Level {nxt['level']} "
+                             f"and come out at '{nxt['name']}'.")
+                continue
+
+            # Catalog rows carry the grid already parsed
+            pos1 = cur.get('pos') or self.parse_grid(cur.get('grid'))
+            pos2 = nxt.get('pos') or self.parse_grid(nxt.get('grid'))
+            if not pos1 or not pos2:
+                # No geometry for this hop: name it without a distance
+                flush()
+                leg = None
+                steps.append(f"Continue to '{nxt['name']}'.")
+                continue
+            dx, dy = pos2[0] - pos1[0], pos2[1] - pos1[1]
+            meters = (dx ** 2 + dy ** 2) ** 0.5 * 1.5  # 假设每单位 = 1.5米
+            direction = self._vector_to_direction(dx, dy) if meters else None
+
+            if leg is not None and (direction is None or leg[0] is None
+                                    or leg[0] == direction):
+                leg[0] = leg[0] or direction
+                leg[1] += meters
+                leg[2].append(leg[3])
+                leg[3] = nxt['name']
+            else:
+                flush()
+                leg = [direction, meters, [], nxt['name']]
+        flush()
+
+        steps.append(f"You have arrived at '{last['name']}'.")
+        return "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+
     def _vector_to_direction(self, dx, dy):
         angle = math.degrees(math.atan2(dy, dx)) % 360
         dirs = [
@@ -221,46 +526,374 @@ class EndeavorRAG:
             (135, "northeast"), (180, "north"),
             (225, "northwest"), (270, "west"), (315, "southwest")
         ]
-        closest = min(dirs, key=lambda d: abs(d[0] - angle))
+        # Compare on the circle, so e.g. 350 degrees is closest to 0
+        closest = min(dirs, key=lambda d: min(abs(d[0] - angle),
+                                              360 - abs(d[0] - angle)))
         return closest[1]
 
 
 
 
+class AsyncEndeavorRAG:
+    """
+    Non-blocking version of EndeavorRAG for the MCP server: Neo4j through
+    the async driver and the LLM through AsyncOpenAI, so one process can
+    serve many navigation requests while others wait on I/O. Queries are
+    the same as EndeavorRAG's; the pure rendering helpers are shared.
+    With a router (llm_router.AsyncLLMRouter) each LLM task goes to its
+    configured, hedged endpoints; otherwise `llm` serves everything.
+    """
+    def __init__(self, driver, llm=None, cache: LLMCache = None,
+                 query_timeout=NEO4J_QUERY_TIMEOUT, limiter=None,
+                 router: AsyncLLMRouter = None):
+        self.driver = driver
+        self.llm = llm
+        self.router = router
+        self.cache = cache
+        self.query_timeout = query_timeout
+        # Optional object with `async acquire()`, awaited before each LLM call
+        self.limiter = limiter
+        self._catalog = None
+        self._catalog_lock = asyncio.Lock()
+
+    async def close(self):
+        await self.driver.close()
+        if self.llm is not None:
+            await self.llm.close()
+        if self.router is not None:
+            await self.router.close()
+
+    def _models(self, task):
+        """Models that may answer `task`, in routing order; for cache keys."""
+        if self.router is not None:
+            return self.router.models_for(task)
+        return [QWEN_MODEL]
+
+    async def _stream(self, task, prompt, answered=None):
+        """
+        Content tokens of one LLM call for `task` ("parse" or "polish").
+        If given, answered["model"] is set to the model that produced them.
+        """
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        messages = [{"role": "user", "content": prompt}]
+        timer = tracing.llm_timer(task)
+        if answered is None:
+            answered = {}
+        if self.router is not None:
+            tokens = self.router.stream(task, messages, answered)
+            try:
+                async for token in tokens:
+                    if timer:
+                        timer.token()
+                    yield token
+            finally:
+                await tokens.aclose()
+                if timer:
+                    timer.finish(answered.get("model", "?"))
+            return
+
+        answered["model"] = QWEN_MODEL
+
+        response = await self.llm.chat.completions.create(
+            model=QWEN_MODEL,
+            messages=messages,
+            stream=True,
+            **QWEN_PARAMS
+        )
+        try:
+            async for chunk in response:
+                content = getattr(chunk.choices[0].delta, "content", "")
+                if content:
+                    if timer:
+                        timer.token()
+                    yield content
+        finally:
+            await response.close()
+            if timer:
+                timer.finish(QWEN_MODEL)
+
+    async def _run(self, cypher, query_name="query", **params):
+        # Server-side transaction timeout, so an abandoned query does not
+        # keep running after the request gave up on it
+        with tracing.span("neo4j." + query_name):
+            async with self.driver.session(database="neo4j") as session:
+                result = await session.run(
+                    Query(cypher, timeout=self.query_timeout), params
+                )
+                records = [record async for record in result]
+                if tracing.ENABLED:
+                    tracing.observe_neo4j(query_name, await result.consume())
+                return records
+
+    async def get_catalog(self):
+        """See EndeavorRAG.catalog; one coroutine loads, the rest wait."""
+        async with self._catalog_lock:
+            if self._catalog is None:
+                self._catalog = await LocationCatalog.aload(self.driver)
+            else:
+                self._catalog = await self._catalog.arefresh(self.driver)
+        return self._catalog
+
+    async def get_location_index(self):
+        return (await self.get_catalog()).index
+
+    async def resolve_locations(self, start, end):
+        index = await self.get_location_index()
+        return (index.lookup(start) if start is not None else None,
+                index.lookup(end))
+
+    async def resolve_parsed(self, text, parsed):
+        """See EndeavorRAG.resolve_parsed."""
+        start, end = await self.resolve_locations(parsed.start, parsed.end)
+        if parsed.model is not None:
+            # The cache is SQLite; keep its I/O off the event loop
+            await asyncio.to_thread(store_parse, self.cache, text,
+                                    parsed.model, start, end)
+        return start, end
+
+    async def parse_user_query(self, text):
+        fast = (await self.get_location_index()).parse(text)
+        if fast is not None:
+            return ParsedQuery(*fast, None)
+        # A hedged call may be answered by any endpoint, and the answer is
+        # cached under the model that gave it, so look under each of them
+        cached = await asyncio.to_thread(cached_parse, self.cache, text,
+                                         *self._models("parse"))
+        if cached is not None:
+            return cached
+        prompt = PARSE_PROMPT.format(text=text)
+        extractor = JSONObjectExtractor()
+        locs = None
+        answered = {}
+        tokens = self._stream("parse", prompt, answered)
+        try:
+            async for content in tokens:
+                if extractor.feed(content):
+                    locs = extractor.result
+                    break
+        finally:
+            await tokens.aclose()
+
+        if locs:
+            return ParsedQuery(locs['start'], locs['end'], answered["model"])
+        raise ValueError("Could not parse locations from LLM response")
+
+    async def get_route(self, start_name, end_name):
+        records = await self._run(ROUTE_QUERY, "route", start=start_name, end=end_name)
+        return route_from_record(records[0] if records else None)
+
+    async def describe_location(self, name):
+        node_infos = (await self.get_catalog()).node_infos([name])
+        if not node_infos:
+            return f"Sorry, I couldn't find {name}."
+        info = node_infos[0]
+        return f"{info['name']} is on Level {info['level']}, grid {info['grid']}."
+
+    async def render_path_to_instruction(self, path):
+        if not path:
+            return "Sorry, I couldn't find a valid path."
+        if len(path) == 1:
+            return f"You are already at {path[0]}."
+
+        node_infos = (await self.get_catalog()).node_infos(path)
+        if not node_infos:
+            return "No valid path found or coordinates missing."
+        return self.render_directions_local(node_infos)
+
+    async def stream_polished_instructions(self, directions):
+        """Yields the polished directions token by token as the LLM streams."""
+        prompt = POLISH_PROMPT.format(directions=directions)
+
+        async for token in self._stream("polish", prompt):
+            yield token
+
+    async def polish_instructions(self, directions):
+        """Rewrites locally rendered directions into friendlier prose."""
+        parts = [t async for t in self.stream_polished_instructions(directions)]
+        return "".join(parts).strip()
+
+    parse_grid = EndeavorRAG.parse_grid
+    render_route = EndeavorRAG.render_route
+    render_directions_local = EndeavorRAG.render_directions_local
+    _vector_to_direction = EndeavorRAG._vector_to_direction
+
+
+# One cache file shared by every MCP worker process on this host. Opened on
+# first use, so importing this module does not create it.
+LLM_CACHE_PATH = os.getenv("WAYFINDER_LLM_CACHE", "llm_cache.sqlite3")
+_LLM_CACHE = None
+
+def get_llm_cache():
+    global _LLM_CACHE
+    if _LLM_CACHE is None:
+        _LLM_CACHE = LLMCache(LLM_CACHE_PATH)
+    return _LLM_CACHE
+
+# Background LLM polish jobs: job id -> asyncio.Task, oldest dropped first
+POLISH_JOBS = OrderedDict()
+MAX_POLISH_JOBS = 256
+
+# One AsyncEndeavorRAG per server process: its Neo4j pool, HTTP keep-alive
+# connections and location index are reused by every request. The async
+# driver belongs to the server's event loop, so it is created on first use.
+_SHARED_RAG = None
+
+def get_shared_rag():
+    global _SHARED_RAG
+    if _SHARED_RAG is None:
+        URI = "neo4j://localhost:7687"
+        AUTH = ("neo4j", "graphrag")
+        # API keys come from each route's api_key_env (NV_API_KEY by default)
+        _SHARED_RAG = AsyncEndeavorRAG(
+            make_async_neo4j_driver(URI, *AUTH),
+            cache=get_llm_cache(),
+            # Small model for parsing, large for prose, hedged on slow TTFT
+            router=AsyncLLMRouter(load_routes(), make_async_llm_client),
+        )
+    return _SHARED_RAG
+
+async def close_shared_rag():
+    global _SHARED_RAG
+    rag, _SHARED_RAG = _SHARED_RAG, None
+    if rag is not None:
+        await rag.close()
+
+def _client_wants_progress(ctx):
+    """True if the MCP client sent a progress token with this request."""
+    if ctx is None:
+        return False
+    meta = ctx.request_context.meta
+    return meta is not None and meta.progressToken is not None
+
+async def _stream_polish(rag, directions, report):
+    """Forwards every polished token to the client; returns the full text."""
+    parts = []
+    async for token in rag.stream_polished_instructions(directions):
+        parts.append(token)
+        await report(token)
+    return "".join(parts).strip()
+
+async def _polish_job(rag, directions):
+    async with asyncio.timeout(POLISH_TIMEOUT):
+        with tracing.span("polish", background=True):
+            return await rag.polish_instructions(directions)
+
 mcp = FastMCP("EndeavorRAG 🚀")
 @mcp.tool
-def endeavor_rag_directory(user_input: str) -> str:
+async def endeavor_rag_directory(user_input: str, polish: bool = False,
+                                 ctx: Context | None = None) -> str:
     """
     Use this tool to get directions from one location to another in the Endeavor building.
+    Set polish=True to have an LLM rewrite the directions. Clients that send a progress
+    token get stage updates, the plain directions and then the polished text token by
+    token as progress messages; others get a job id for endeavor_rag_polished_directions.
     """
-    URI = "neo4j://localhost:7687"
-    AUTH = ("neo4j", "graphrag")
-    #OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    OPENAI_API_KEY = os.getenv("NV_API_KEY")
-
-    #rag = EndeavorRAG(URI, AUTH[0], AUTH[1], OPENAI_API_KEY)
-    rag = EndeavorRAG(
-        URI, AUTH[0], AUTH[1],
-        OPENAI_API_KEY,
-        base_url="https://integrate.api.nvidia.com/v1"
-    )
+    rag = get_shared_rag()
+    streaming = _client_wants_progress(ctx)
+    step = 0
+
+    async def report(message):
+        nonlocal step
+        step += 1
+        if streaming:
+            await ctx.report_progress(step, message=message)
 
     #user_input = "How do I get from Force Field to Cafeteria?"
     #user_input = "How do I get from Jabba's Palace to Cafeteria?"
     #user_input = "How do I get from Cafeteria to WestWorld?"
+    instructions = None
+    with tracing.span("request", polish=polish, streaming=streaming) as request:
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                await report("Understanding your question...")
+                with tracing.span("parse"):
+                    parsed = await rag.parse_user_query(user_input)
+                with tracing.span("resolve"):
+                    start, end = await rag.resolve_parsed(user_input, parsed)
+                request.set(start=start, end=end)
+                if start is None:
+                    # "Where is X?" -- no route needed
+                    with tracing.span("describe"):
+                        instructions = await rag.describe_location(end)
+                else:
+                    await report(f"Finding a route from {start} to {end}...")
+                    with tracing.span("route"):
+                        route = await rag.get_route(start, end)
+                    with tracing.span("render", hops=len(route)):
+                        instructions = rag.render_route(route)
+            if polish and start is not None and len(route) > 1:
+                if streaming:
+                    # Usable directions first, then the polished text as it streams
+                    await report(instructions)
+                    async with asyncio.timeout(POLISH_TIMEOUT):
+                        with tracing.span("polish"):
+                            instructions = await _stream_polish(rag, instructions, report)
+                else:
+                    job_id = uuid.uuid4().hex[:12]
+                    POLISH_JOBS[job_id] = asyncio.create_task(
+                        _polish_job(rag, instructions)
+                    )
+                    while len(POLISH_JOBS) > MAX_POLISH_JOBS:
+                        POLISH_JOBS.popitem(last=False)[1].cancel()
+                    instructions += (f"\n\n(Polished directions job: {job_id} -- "
+                                     "call endeavor_rag_polished_directions)")
+        except UnknownLocation as e:
+            log.info("unknown location: %s", e)
+            request.set(error="unknown_location")
+            instructions = str(e)
+        except TimeoutError:
+            log.warning("request timed out: %r", user_input)
+            request.set(error="timeout")
+            # Keep the plain directions if only the polishing ran out of time
+            instructions = instructions or "Sorry, that took too long. Please try again."
+        except Exception as e:
+            log.exception("request failed: %r", user_input)
+            request.set(error=type(e).__name__)
+            instructions = f"Sorry, I couldn't work out directions: {e}"
+    return instructions
+
+@mcp.tool
+def endeavor_rag_polished_directions(job_id: str) -> str:
+    """
+    Returns the LLM-polished version of directions requested with polish=True.
+    """
+    task = POLISH_JOBS.get(job_id)
+    if task is None:
+        return f"Unknown or expired polish job: {job_id}"
+    if not task.done():
+        return "Still polishing, try again in a moment."
+    POLISH_JOBS.pop(job_id, None)
+    if task.cancelled():
+        return "Polishing was cancelled."
     try:
-        start, end = rag.parse_user_query(user_input)
-        path = rag.get_shortest_path(start, end)
-        instructions = rag.render_path_to_instruction(path)
-        print("Path found:", path)
-        print("Instructions:", instructions)
+        return task.result()
+    except TimeoutError:
+        return "Polishing timed out."
     except Exception as e:
-        print("Error:", e)
+        return f"Polishing failed: {e}"
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    """Latency histograms in the Prometheus text format (empty when tracing is off)."""
+    return PlainTextResponse(tracing.render_metrics(),
+                             media_type="text/plain; version=0.0.4")
+
+async def main():
+    if tracing.ENABLED:
+        tracing.configure_logging()
+    # Open the pools and load the location index before the first request
+    rag = get_shared_rag()
+    try:
+        await rag.driver.verify_connectivity()
+        await rag.get_location_index()
+    except Exception as e:
+        print("Warm-up skipped:", e)
+    try:
+        await mcp.run_async(transport="http", host="0.0.0.0", port=8008, path="/mcp")
     finally:
-        rag.close()
-    return instructions
+        await close_shared_rag()
 
 if __name__ == "__main__":
     print("Starting EndeavorRAG MCP server...")
-    mcp.run(transport="http", host="0.0.0.0", port=8008, path="/mcp")
-    
\ No newline at end of file
+    asyncio.run(main())
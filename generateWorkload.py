@@ -0,0 +1,190 @@
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from copyImport import copy_line
+
+# Deterministic synthetic booking workload (the large-scale counterpart of
+# BuildBookTable.py).
+#
+# Rooms are the map's conference rooms that have a grid; --rooms N pads
+# them with synthetic rooms (or cuts them) to exactly N. The generator then
+# walks the days in order and, within each day, every room in turn: first
+# the room's weekly recurring meetings for that weekday are laid down, then
+# the rest of the working day is filled with ad-hoc meetings following an
+# hourly occupancy curve (busy late morning and mid afternoon, quiet at
+# lunch, near empty at weekends). Each room has its own random stream
+# derived from --seed, so the same arguments always produce the same
+# bookings.
+#
+# Output is streamed in that order (day, then room, then start time) as
+# JSON Lines for copyImport.py / syncBookings.py, or as COPY text for
+#   COPY bookings (room_id, timeslot, booked_by, title) FROM STDIN
+#
+#   python generateWorkload.py --rooms 5000 --days 90 --out bookings.jsonl \
+#       --rooms-out rooms.jsonl
+
+SLOT_MINUTES = 15
+DAY_START_HOUR = 8
+DAY_END_HOUR = 19
+SLOTS_PER_DAY = (DAY_END_HOUR - DAY_START_HOUR) * 60 // SLOT_MINUTES
+
+# Probability that a free slot starting in this hour gets a meeting (weekday)
+HOURLY_OCCUPANCY = {
+    8: 0.10, 9: 0.30, 10: 0.45, 11: 0.40, 12: 0.12, 13: 0.25,
+    14: 0.45, 15: 0.40, 16: 0.25, 17: 0.10, 18: 0.04,
+}
+WEEKEND_FACTOR = 0.08
+DURATIONS = [30, 30, 45, 60, 60, 60, 90, 120]  # minutes, weighted by repeats
+CAPACITIES = [4, 4, 6, 6, 8, 10, 12, 16, 20]
+PEOPLE = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "George", "Hannah",
+          "Ivy", "Jack", "Kathy", "Larry", "Mia", "Nate", "Olivia", "Peter",
+          "Quinn", "Rachel", "Sam", "Tina", "Ursula", "Victor", "Wendy",
+          "Xavier", "Yvonne", "Zach", "Zoe"]
+TITLES = ["Sync", "1:1", "Design review", "Planning", "Standup", "Interview",
+          "Retro", "Customer call", ""]
+
+
+def load_rooms(map_path, total, seed):
+    """Rooms from the map, padded with deterministic synthetic rooms."""
+    with open(map_path) as f:
+        rooms = [
+            {"id": r["id"], "name": r["name"], "level": r.get("level"),
+             "location": {"grid": r["location"]["grid"]},
+             "capacity": r.get("capacity"), "type": "ConferenceRoom"}
+            for r in json.load(f)
+            if r["type"].replace(" ", "") == "ConferenceRoom"
+            and r["location"].get("grid")
+        ]
+    rng = random.Random(f"rooms-{seed}")
+    for n in range(len(rooms), total or 0):
+        level = rng.randint(1, 10)
+        rooms.append({
+            "id": f"SYN{level}-{n:06d}",
+            "name": f"Synthetic Room {n}",
+            "level": level,
+            "location": {"grid": f"{chr(ord('A') + rng.randrange(24))}"
+                                 f"{rng.randint(1, 31)}"},
+            "capacity": rng.choice(CAPACITIES),
+            "type": "ConferenceRoom",
+        })
+    return rooms[:total] if total else rooms
+
+
+class RoomSchedule:
+    """Random stream, popularity and recurring meetings of one room."""
+    def __init__(self, room, seed):
+        self.room_id = room["id"]
+        self.rng = random.Random(f"{seed}-{self.room_id}")
+        # Some rooms are much busier than others
+        self.popularity = min(2.0, self.rng.lognormvariate(0, 0.4))
+        self.recurring = []
+        for _ in range(self.rng.randint(0, 4)):
+            self.recurring.append((
+                self.rng.randrange(5),                      # weekday
+                self.rng.randrange(4, SLOTS_PER_DAY - 8),   # start slot
+                self.rng.choice([30, 30, 60]) // SLOT_MINUTES,
+                self.rng.choice(PEOPLE),
+                self.rng.choice(["Weekly sync", "Team meeting", "Standup",
+                                 "Staff meeting"]),
+            ))
+
+    def day(self, date):
+        """Yields (start_slot, slots, booked_by, title) for one day."""
+        taken = [False] * SLOTS_PER_DAY
+        meetings = []
+        for weekday, start, length, owner, title in self.recurring:
+            if weekday == date.weekday() and not any(taken[start:start + length]):
+                taken[start:start + length] = [True] * length
+                meetings.append((start, length, owner, title))
+
+        factor = self.popularity * (WEEKEND_FACTOR if date.weekday() >= 5 else 1)
+        slot = 0
+        while slot < SLOTS_PER_DAY:
+            hour = DAY_START_HOUR + slot * SLOT_MINUTES // 60
+            if taken[slot] or self.rng.random() >= HOURLY_OCCUPANCY[hour] * factor:
+                slot += 1
+                continue
+            length = self.rng.choice(DURATIONS) // SLOT_MINUTES
+            length = min(length, SLOTS_PER_DAY - slot)
+            # Shorten the meeting to fit before the next recurring one
+            free = 0
+            while free < length and not taken[slot + free]:
+                free += 1
+            meetings.append((slot, free, self.rng.choice(PEOPLE),
+                             self.rng.choice(TITLES)))
+            slot += free
+        meetings.sort()
+        return meetings
+
+
+def generate(rooms, start_date, days, seed):
+    """Yields booking dicts ordered by day, then room, then start time."""
+    schedules = [RoomSchedule(room, seed) for room in rooms]
+    # "HH:MM" for every slot boundary, so no datetime math per booking
+    clock = [f"{DAY_START_HOUR + m // 60:02d}:{m % 60:02d}"
+             for m in range(0, SLOTS_PER_DAY * SLOT_MINUTES + 1, SLOT_MINUTES)]
+    for offset in range(days):
+        date = start_date + timedelta(days=offset)
+        day = f"{date:%Y-%m-%d}"
+        day_key = f"{date:%Y%m%d}"
+        for schedule in schedules:
+            for slot, length, owner, title in schedule.day(date):
+                start = clock[slot]
+                yield {
+                    "external_id": f"{schedule.room_id}:{day_key}"
+                                   f"{start.replace(':', '')}",
+                    "room_id": schedule.room_id,
+                    "start": f"{day} {start}",
+                    "end": f"{day} {clock[slot + length]}",
+                    "booked_by": owner,
+                    "title": title,
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", default="en-map.json")
+    parser.add_argument("--rooms", type=int, default=0,
+                        help="total rooms (pads the map with synthetic rooms)")
+    parser.add_argument("--start", default="2025-06-02", help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["jsonl", "copy"], default="jsonl")
+    parser.add_argument("--out", help="bookings output file (default stdout)")
+    parser.add_argument("--rooms-out", help="write the room list as JSON Lines")
+    args = parser.parse_args()
+
+    rooms = load_rooms(args.map, args.rooms, args.seed)
+    if args.rooms_out:
+        with open(args.rooms_out, "w") as f:
+            for room in rooms:
+                f.write(json.dumps(room) + "\n")
+
+    start_date = datetime.strptime(args.start, "%Y-%m-%d")
+    out = open(args.out, "w", buffering=1 << 20) if args.out else sys.stdout
+    began = time.perf_counter()
+    rows = 0
+    try:
+        for b in generate(rooms, start_date, args.days, args.seed):
+            if args.format == "jsonl":
+                out.write(json.dumps(b) + "\n")
+            else:
+                out.write(copy_line(b["room_id"],
+                                    f"[\"{b['start']}\",\"{b['end']}\")",
+                                    b["booked_by"], b["title"]))
+            rows += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - began
+    print(f"Generated {rows} bookings for {len(rooms)} rooms over {args.days} "
+          f"days in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s).",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import json, psycopg2
 from psycopg2.extras import execute_batch
 from datetime import datetime
 
+from bookings_partitions import ensure_partitions, is_partitioned, next_month
+
 PG_DSN = "dbname=meeting_rooms user=postgres password=postgres host=localhost port=5432"
 
 def load_rooms(conn, rooms):
@@ -22,6 +24,9 @@ def load_rooms(conn, rooms):
     execute_batch(conn.cursor(), sql, payload)
 
 def load_bookings(conn, bookings):
+    if is_partitioned(conn):
+        load_bookings_partitioned(conn, bookings)
+        return
     sql = """INSERT INTO bookings(room_id,timeslot,booked_by,title)
              VALUES (%s, tsrange(%s, %s, '[)') , %s, %s);"""
     payload = [
@@ -36,6 +41,29 @@ def load_bookings(conn, bookings):
     ]
     execute_batch(conn.cursor(), sql, payload)
 
+def load_bookings_partitioned(conn, bookings):
+    # Create the monthly partitions first and sort by start time, so each
+    # page of the batch goes to (mostly) one partition.
+    bookings = sorted(bookings, key=lambda b: b["start"])
+    if bookings:
+        first = datetime.strptime(bookings[0]["start"], "%Y-%m-%d %H:%M")
+        last = datetime.strptime(bookings[-1]["start"], "%Y-%m-%d %H:%M")
+        ensure_partitions(conn, first, next_month(last))
+    sql = """INSERT INTO bookings(room_id,timeslot,starts_at,booked_by,title)
+             VALUES (%s, tsrange(%s, %s, '[)'), %s, %s, %s);"""
+    payload = [
+        (
+            b["room_id"],
+            b["start"],
+            b["end"],
+            b["start"],
+            b["booked_by"],
+            b.get("title","")
+        )
+        for b in bookings
+    ]
+    execute_batch(conn.cursor(), sql, payload)
+
 def main():
 
     
@@ -0,0 +1,100 @@
+import ast
+import json
+
+# Incremental extraction of a JSON object from a streamed LLM reply.
+#
+# The parse prompt asks for {"start": ..., "end": ...}, but the reply may
+# open with <think>...</think> reasoning and close with chatter. Chunks are
+# fed in as they arrive; text inside <think> blocks is skipped, braces are
+# counted outside JSON strings, and the moment a top-level object closes
+# it is decoded with json.loads (ast.literal_eval for the single-quoted
+# dicts some models emit; never eval) and checked for the required keys. The
+# caller can then stop reading and close the stream instead of paying for
+# the rest of the completion.
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class JSONObjectExtractor:
+    def __init__(self, required=("start", "end")):
+        self.required = required
+        self.result = None
+        self._pending = ""    # text that may still be a partial think tag
+        self._thinking = False
+        self._object = []     # characters of the object being read
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk):
+        """Consumes a chunk; returns the object once one is complete."""
+        if self.result is not None:
+            return self.result
+        text = self._pending + chunk
+        self._pending = ""
+        i = 0
+        while i < len(text):
+            if self._thinking:
+                end = text.find(THINK_CLOSE, i)
+                if end < 0:
+                    # Keep a possible partial closing tag for the next chunk
+                    self._pending = text[max(i, len(text) - len(THINK_CLOSE) + 1):]
+                    return None
+                self._thinking = False
+                i = end + len(THINK_CLOSE)
+                continue
+            if self._depth == 0 and text[i] == "<":
+                if text.startswith(THINK_OPEN, i):
+                    self._thinking = True
+                    i += len(THINK_OPEN)
+                    continue
+                if THINK_OPEN.startswith(text[i:]):
+                    self._pending = text[i:]
+                    return None
+            if self._scan(text[i]):
+                return self.result
+            i += 1
+        return None
+
+    def _scan(self, ch):
+        if self._depth == 0:
+            if ch == "{":
+                self._object = [ch]
+                self._depth = 1
+            return False
+        self._object.append(ch)
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif ch == "\\":
+                self._escaped = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch == "{":
+            self._depth += 1
+        elif ch == "}":
+            self._depth -= 1
+            if self._depth == 0:
+                return self._accept("".join(self._object))
+        return False
+
+    def _accept(self, text):
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                obj = ast.literal_eval(text)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                return False  # e.g. a {placeholder} in prose; keep looking
+        if isinstance(obj, dict) and all(k in obj for k in self.required):
+            self.result = obj
+            return True
+        return False
+
+
+def extract_json_object(text, required=("start", "end")):
+    """One-shot form for a complete reply; None if it holds no such object."""
+    return JSONObjectExtractor(required).feed(text)
@@ -0,0 +1,11 @@
+# Summary statistics shared by the benchmark and batch scripts
+# (bench_recommender.py, batch_navigate.py).
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list; nan if it is empty."""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1,
+                max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Disk-backed cache for LLM answers, shared by every process on the host.
+#
+# Entries live in a SQLite database in WAL mode, so several MCP worker
+# processes can read and write it concurrently. Keys are a hash of the
+# normalised query text, the model name and a prompt version; bump the
+# prompt version whenever the prompt changes so stale answers are never
+# served. Entries expire after `ttl` seconds, and once the table grows
+# past `max_entries` the least recently used rows are evicted.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+"""
+
+
+def normalize_query(text):
+    """Case and whitespace insensitive form of a user query."""
+    return " ".join(text.lower().split())
+
+
+class LLMCache:
+    def __init__(self, path="llm_cache.sqlite3", ttl=7 * 24 * 3600,
+                 max_entries=10000, evict_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(text, model, prompt_version):
+        raw = "\0".join((normalize_query(text), model, prompt_version))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, text, model, prompt_version):
+        """The cached value (any JSON type) or None on a miss."""
+        key = self.make_key(text, model, prompt_version)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?",
+                     (now, key))
+        return json.loads(row[0])
+
+    def set(self, text, model, prompt_version, value):
+        key = self.make_key(text, model, prompt_version)
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl, now)
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Drops expired rows, then the least recently used over the limit."""
+        conn = self._conn()
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?",
+                     (time.time(),))
+        conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_used DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
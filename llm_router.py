@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+
+# Task-based LLM routing with hedged requests.
+#
+# Each task ("parse", "polish") has an ordered list of endpoints, each a
+# base_url + model + sampling parameters. A call streams from the first
+# endpoint; if no token has arrived after the task's `ttft_deadline`
+# seconds (or the endpoint fails), the same request is also sent to the
+# next endpoint, and whichever produces a token first is streamed to the
+# caller while the others are cancelled and their HTTP streams closed.
+#
+# Routes default to DEFAULT_ROUTES and can be replaced by a JSON file of
+# the same shape (WAYFINDER_LLM_ROUTES), e.g. to point both endpoints at
+# llm_stub_server.py for local testing:
+#   {"parse": {"ttft_deadline": 0.5, "endpoints": [
+#       {"base_url": "http://localhost:8101/v1", "model": "stub"},
+#       {"base_url": "http://localhost:8102/v1", "model": "stub"}]}}
+
+NVIDIA_URL = "https://integrate.api.nvidia.com/v1"
+
+DEFAULT_ROUTES = {
+    # Extraction: small, fast model; hedge to the large one if it stalls
+    "parse": {
+        "ttft_deadline": 1.5,
+        "endpoints": [
+            {"base_url": NVIDIA_URL, "api_key_env": "NV_API_KEY",
+             "model": "meta/llama-3.1-8b-instruct",
+             "params": {"temperature": 0.0, "max_tokens": 128}},
+            {"base_url": NVIDIA_URL, "api_key_env": "NV_API_KEY",
+             "model": "qwen/qwen3-235b-a22b",
+             "params": {"temperature": 0.2, "top_p": 0.7, "max_tokens": 1024,
+                        "extra_body": {"chat_template_kwargs": {"thinking": True}}}},
+        ],
+    },
+    # Prose: large model; hedge to a mid-size one
+    "polish": {
+        "ttft_deadline": 3.0,
+        "endpoints": [
+            {"base_url": NVIDIA_URL, "api_key_env": "NV_API_KEY",
+             "model": "qwen/qwen3-235b-a22b",
+             "params": {"temperature": 0.2, "top_p": 0.7, "max_tokens": 1024,
+                        "extra_body": {"chat_template_kwargs": {"thinking": True}}}},
+            {"base_url": NVIDIA_URL, "api_key_env": "NV_API_KEY",
+             "model": "meta/llama-3.3-70b-instruct",
+             "params": {"temperature": 0.2, "max_tokens": 1024}},
+        ],
+    },
+}
+
+
+def load_routes(path=None):
+    """Routes from a JSON file if given (or WAYFINDER_LLM_ROUTES), else defaults."""
+    path = path or os.getenv("WAYFINDER_LLM_ROUTES")
+    if not path:
+        return DEFAULT_ROUTES
+    with open(path) as f:
+        return json.load(f)
+
+
+class _Attempt:
+    """One streamed request to one endpoint; `first` resolves to its first token."""
+    def __init__(self, client, endpoint, messages):
+        self.endpoint = endpoint
+        self.response = None
+        self.tokens = self._tokens(client, messages)
+        self.first = asyncio.ensure_future(self._first())
+
+    async def _tokens(self, client, messages):
+        try:
+            self.response = await client.chat.completions.create(
+                model=self.endpoint["model"],
+                messages=messages,
+                stream=True,
+                **self.endpoint.get("params", {}),
+            )
+            async for chunk in self.response:
+                if not chunk.choices:
+                    continue
+                content = getattr(chunk.choices[0].delta, "content", "")
+                if content:
+                    yield content
+        finally:
+            if self.response is not None:
+                await self.response.close()
+
+    async def _first(self):
+        try:
+            return await anext(self.tokens)
+        except StopAsyncIteration:
+            return ""
+
+    async def close(self):
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        await self.tokens.aclose()
+
+
+class AsyncLLMRouter:
+    def __init__(self, routes=None, client_factory=None):
+        """
+        routes:         {task: {"ttft_deadline": s, "endpoints": [...]}}
+        client_factory: (api_key, base_url) -> AsyncOpenAI-compatible client
+        """
+        self.routes = routes or load_routes()
+        self.client_factory = client_factory
+        self._clients = {}
+
+    def models_for(self, task):
+        """Models of a task's endpoints, in the order they are tried."""
+        return [endpoint["model"] for endpoint in self.routes[task]["endpoints"]]
+
+    def _client(self, endpoint):
+        api_key = os.getenv(endpoint.get("api_key_env", ""), "") or "none"
+        key = (endpoint["base_url"], api_key)
+        if key not in self._clients:
+            self._clients[key] = self.client_factory(api_key, endpoint["base_url"])
+        return self._clients[key]
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+    async def stream(self, task, messages, answered=None):
+        """
+        Yields content tokens for `task` from the first endpoint to answer.
+        If given, answered["model"] is set to that endpoint's model before
+        the first token.
+        """
+        route = self.routes[task]
+        waiting = list(route["endpoints"])
+        deadline = route.get("ttft_deadline")
+        running, winner, error = [], None, None
+        start_next = True
+        try:
+            while winner is None:
+                if start_next and waiting:
+                    endpoint = waiting.pop(0)
+                    running.append(_Attempt(self._client(endpoint), endpoint, messages))
+                if not running:
+                    raise error
+                firsts = {attempt.first: attempt for attempt in running}
+                done, _ = await asyncio.wait(
+                    firsts, timeout=deadline if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                # Nothing yet: hedge with the next endpoint
+                start_next = not done
+                for future in done:
+                    attempt = firsts[future]
+                    if future.exception() is None:
+                        winner = winner or attempt
+                    else:
+                        error = future.exception()
+                        running.remove(attempt)
+                        await attempt.close()
+                        start_next = True
+
+            for attempt in running:
+                if attempt is not winner:
+                    await attempt.close()
+            running = [winner]
+            if answered is not None:
+                answered["model"] = winner.endpoint["model"]
+
+            first = winner.first.result()
+            if first:
+                yield first
+            async for token in winner.tokens:
+                yield token
+        finally:
+            for attempt in running:
+                await attempt.close()
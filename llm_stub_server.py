@@ -0,0 +1,118 @@
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal OpenAI-compatible chat completions server for local testing.
+#
+# POST /v1/chat/completions answers in the OpenAI streaming (SSE) or plain
+# JSON format. Parse prompts ("Extract the start and end locations ...")
+# get {"start": ..., "end": ...} from a "from X to Y" regex; anything else
+# is echoed back. --ttft delays the first token and --token-delay every
+# following one, so two stubs with different delays exercise the hedging
+# in llm_router.py without touching a real endpoint:
+#
+#   python llm_stub_server.py --port 8101 --ttft 3
+#   python llm_stub_server.py --port 8102 --ttft 0.1
+
+QUOTED = re.compile(r'"(.*?)"', re.DOTALL)
+ROUTE = re.compile(r"from (?P<start>.+?) to (?P<end>.+?)[?.!]*$", re.IGNORECASE)
+WHERE = re.compile(r"where(?:'s| is) (?P<end>.+?)[?.!]*$", re.IGNORECASE)
+
+
+def answer(prompt):
+    if "Extract the start and end locations" in prompt:
+        match = QUOTED.search(prompt)
+        sentence = match.group(1).strip() if match else ""
+        route = ROUTE.search(sentence)
+        if route:
+            return json.dumps({"start": route.group("start"), "end": route.group("end")})
+        where = WHERE.search(sentence)
+        return json.dumps({"start": None, "end": where.group("end") if where else sentence})
+    return prompt.strip().splitlines()[-1].strip() if prompt.strip() else ""
+
+
+def tokens(text):
+    """Word-ish pieces, like a real tokenizer streams them."""
+    return re.findall(r"\s*\S+", text) or [""]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    ttft = 0.0
+    token_delay = 0.0
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        model = body.get("model", "stub")
+        text = answer(prompt)
+        time.sleep(self.ttft)
+
+        if not body.get("stream"):
+            self._send_json({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(tokens(text)):
+                if i:
+                    time.sleep(self.token_delay)
+                self._send_event(model, {"role": "assistant", "content": piece}, None)
+            self._send_event(model, {}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client closed the stream early, as the router does
+
+    def _send_event(self, model, delta, finish_reason):
+        chunk = {"id": "stub", "object": "chat.completion.chunk",
+                 "created": int(time.time()), "model": model,
+                 "choices": [{"index": 0, "delta": delta,
+                              "finish_reason": finish_reason}]}
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--ttft", type=float, default=0.0,
+                        help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.01,
+                        help="seconds between tokens")
+    args = parser.parse_args()
+
+    StubHandler.ttft = args.ttft
+    StubHandler.token_delay = args.token_delay
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1 "
+          f"(ttft {args.ttft}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+from location_parser import LocationIndex, load_aliases
+
+# In-memory copy of every Location's name, grid and level.
+#
+# Rendering directions needs the grid and level of each node on a path,
+# which only change when the map is rebuilt. The catalog loads them once
+# (names and grids interned, grids pre-parsed to (col, row)) and remembers
+# the graph version it was loaded from. The builders stamp a fresh version
+# on a (:GraphMeta) node after every rebuild; graphs built before that
+# fall back to a node/relationship count fingerprint. refresh() checks the
+# version at most every `check_interval` seconds and reloads on change.
+
+GRAPH_META_KEY = "wayfinder"
+
+# Optional {alias: canonical name} JSON for nicknames the map does not have
+ALIASES_PATH = os.getenv("WAYFINDER_ALIASES", "location_aliases.json")
+
+LOCATIONS_QUERY = """
+MATCH (n:Location) WHERE n.name IS NOT NULL
+RETURN n.id AS id, n.name AS name, n.grid AS grid, n.level AS level
+"""
+
+VERSION_QUERY = """
+OPTIONAL MATCH (m:GraphMeta {key: $key})
+CALL { MATCH (n:Location) RETURN count(n) AS nodes }
+CALL { MATCH ()-[r]->() RETURN count(r) AS rels }
+RETURN m.version AS version, nodes, rels
+"""
+
+STAMP_QUERY = """
+MERGE (m:GraphMeta {key: $key})
+SET m.version = randomUUID(), m.built_at = datetime()
+RETURN m.version AS version
+"""
+
+Location = namedtuple("Location", "id name grid level pos")
+
+
+def stamp_graph_version(session):
+    """Marks the graph as rebuilt; call at the end of a builder run."""
+    return session.run(STAMP_QUERY, key=GRAPH_META_KEY).single()["version"]
+
+
+def parse_grid(grid):
+    """'AB12' -> (28, 12), same numbering as EndeavorRAG.parse_grid."""
+    match = re.match(r"([A-Z]+)(\d+)", grid or "")
+    if not match:
+        return None
+    col = sum((ord(c) - ord('A') + 1) * (26 ** i)
+              for i, c in enumerate(reversed(match.group(1))))
+    return (col, int(match.group(2)))
+
+
+def graph_version(record):
+    """Version string from a VERSION_QUERY record."""
+    if record["version"] is not None:
+        return record["version"]
+    return f"count:{record['nodes']}:{record['rels']}"
+
+
+class LocationCatalog:
+    def __init__(self, records, version, check_interval=30.0):
+        self.version = version
+        self.check_interval = check_interval
+        self.checked_at = time.monotonic()
+        self.by_name = {}
+        self.by_id = {}
+        self._infos = {}
+        self._index = None
+        for r in records:
+            name = sys.intern(r["name"])
+            grid = sys.intern(r["grid"]) if r["grid"] else r["grid"]
+            loc = Location(r["id"], name, grid, r["level"], parse_grid(grid))
+            # Duplicate names keep the first node; routing by id avoids this
+            self.by_name.setdefault(name, loc)
+            self.by_id[loc.id] = loc
+            # Same shape as EndeavorRAG.get_node_details rows, built once
+            self._infos.setdefault(name, {"name": name, "grid": grid,
+                                          "level": loc.level, "pos": loc.pos})
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    @property
+    def names(self):
+        return list(self.by_name)
+
+    @property
+    def index(self):
+        """LocationIndex over the catalog's names and aliases, built on first use."""
+        if self._index is None:
+            aliases = {alias: name for alias, name in load_aliases(ALIASES_PATH).items()
+                       if name in self.by_name}
+            self._index = LocationIndex(self.by_name, aliases)
+        return self._index
+
+    def node_infos(self, names):
+        """Node details for a path of names; unknown names are skipped."""
+        infos = self._infos
+        return [infos[n] for n in names if n in infos]
+
+    def _due(self):
+        return time.monotonic() - self.checked_at >= self.check_interval
+
+    # --- sync driver ---
+
+    @classmethod
+    def load(cls, driver, check_interval=30.0, database="neo4j"):
+        with driver.session(database=database) as session:
+            version = graph_version(session.run(VERSION_QUERY, key=GRAPH_META_KEY).single())
+            records = list(session.run(LOCATIONS_QUERY))
+        return cls(records, version, check_interval)
+
+    def refresh(self, driver, database="neo4j"):
+        """Returns this catalog, or a reloaded one if the graph changed."""
+        if not self._due():
+            return self
+        with driver.session(database=database) as session:
+            version = graph_version(session.run(VERSION_QUERY, key=GRAPH_META_KEY).single())
+        self.checked_at = time.monotonic()
+        if version == self.version:
+            return self
+        return self.load(driver, self.check_interval, database)
+
+    # --- async driver ---
+
+    @classmethod
+    async def aload(cls, driver, check_interval=30.0, database="neo4j"):
+        async with driver.session(database=database) as session:
+            result = await session.run(VERSION_QUERY, key=GRAPH_META_KEY)
+            version = graph_version(await result.single())
+            result = await session.run(LOCATIONS_QUERY)
+            records = [r async for r in result]
+        return cls(records, version, check_interval)
+
+    async def arefresh(self, driver, database="neo4j"):
+        if not self._due():
+            return self
+        async with driver.session(database=database) as session:
+            result = await session.run(VERSION_QUERY, key=GRAPH_META_KEY)
+            version = graph_version(await result.single())
+        self.checked_at = time.monotonic()
+        if version == self.version:
+            return self
+        return await self.aload(driver, self.check_interval, database)
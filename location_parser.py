@@ -0,0 +1,246 @@
+import difflib
+import json
+import os
+import re
+from collections import Counter
+
+# Deterministic fast path for pulling locations out of navigation questions.
+#
+# Every Location name (plus derived and explicit aliases) is normalised and
+# stored in a token trie. The common phrasings
+#     "How do I get from Force Field to Cafeteria?"
+#     "Take me to Cafeteria from Force Field"
+#     "Where is Jabba's Palace?"
+# are recognised with a few regexes, and each captured span is resolved by
+# exact alias lookup, then a close fuzzy match of the whole span. A span
+# that merely contains an alias ("the room next to the Cafeteria") is not
+# resolved; that and anything ambiguous returns None so the caller can fall
+# back to the LLM.
+#
+# candidates() serves the names the LLM extracts: every alias key is also
+# indexed by character trigrams, so a misspelt or partial name is matched
+# against a short list of keys sharing trigrams instead of every key, and
+# the result is a ranked list that callers can offer as suggestions. Names
+# only mentioned inside a longer span are ranked too, but never high enough
+# for lookup() to accept them.
+
+FUZZY_CUTOFF = 0.82
+FUZZY_MARGIN = 0.05  # best fuzzy match must beat the runner-up by this much
+SHORTLIST = 20       # alias keys rescored per fuzzy lookup
+# Span merely contains a full alias, e.g. "the room next to the Cafeteria".
+# Kept below FUZZY_CUTOFF so lookup() only ever offers it as a suggestion.
+MENTION_SCORE = 0.75
+
+ROUTE_PATTERNS = [
+    re.compile(r"\bfrom (?P<start>.+?) (?:to|towards|until) (?P<end>.+)$"),
+    re.compile(r"\b(?:to|towards) (?P<end>.+?) from (?P<start>.+)$"),
+    re.compile(r"^(?:route |directions |path )?(?P<start>.+?) to (?P<end>.+)$"),
+]
+WHERE_PATTERNS = [
+    re.compile(r"\bwhere(?:s| is| are| can i find) (?P<end>.+)$"),
+    re.compile(r"\b(?:how do i find|how can i find|find|locate) (?P<end>.+)$"),
+]
+FILLER = re.compile(
+    r"^(?:the|a|an|room|my)\s+|\s+(?:please|thanks|thank you|room|now)$"
+)
+
+
+def normalize(text):
+    """Lower case, apostrophes dropped, other punctuation as spaces."""
+    text = text.lower().replace("'", "").replace("’", "")
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return text.strip()
+
+
+def derived_aliases(name):
+    """Variants users actually type, e.g. without "(Restricted)"."""
+    aliases = {name}
+    bare = re.sub(r"\s*\(.*?\)\s*", " ", name).strip()
+    aliases.add(bare)
+    if "/" in bare:
+        aliases.add(bare.split("/")[0])
+    if bare.lower().startswith("the "):
+        aliases.add(bare[4:])
+    return aliases
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_aliases(path):
+    """{alias: canonical name} from a JSON file; {} if it does not exist."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+class UnknownLocation(LookupError):
+    """A name that matches no Location confidently; carries suggestions."""
+    def __init__(self, name, candidates):
+        self.name = name
+        self.candidates = candidates
+        message = f"I couldn't find a location called '{name}'."
+        if candidates:
+            message += " Did you mean: " + ", ".join(
+                f"'{n}'" for n, _ in candidates[:3]) + "?"
+        super().__init__(message)
+
+
+def _strip_filler(span):
+    previous = None
+    while span != previous:
+        previous, span = span, FILLER.sub("", span).strip()
+    return span
+
+
+class LocationIndex:
+    def __init__(self, names, aliases=None):
+        """
+        names:   canonical Location names
+        aliases: optional {alias: canonical name} for nicknames
+        """
+        self.names = set(names)
+        self.alias_map = {}
+        for name in self.names:
+            for alias in derived_aliases(name):
+                self._add(alias, name)
+        for alias, name in (aliases or {}).items():
+            self._add(alias, name)
+
+        self.trie = {}
+        for key, targets in self.alias_map.items():
+            node = self.trie
+            for token in key.split():
+                node = node.setdefault(token, {})
+            node.setdefault("$", set()).update(targets)
+        self._keys = list(self.alias_map)
+        self._grams = {}
+        for key in self._keys:
+            for gram in trigrams(key):
+                self._grams.setdefault(gram, []).append(key)
+
+    def _add(self, alias, name):
+        key = normalize(alias)
+        if key:
+            self.alias_map.setdefault(key, set()).add(name)
+
+    def resolve(self, span):
+        """
+        The single Location a text span names, or None. The alias (or its
+        close fuzzy match) has to cover the whole span once filler words
+        are stripped.
+        """
+        key = _strip_filler(normalize(span))
+        if not key:
+            return None
+        targets = self.alias_map.get(key)
+        if targets:
+            return next(iter(targets)) if len(targets) == 1 else None
+        return self._fuzzy(key)
+
+    def mentions(self, normalized_text):
+        """Longest alias matches as (first token, end token, names)."""
+        tokens = normalized_text.split()
+        results = []
+        i = 0
+        while i < len(tokens):
+            node, match = self.trie, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if "$" in node:
+                    match = (i, j + 1, node["$"])
+            if match:
+                results.append(match)
+                i = match[1]
+            else:
+                i += 1
+        return results
+
+    def _shortlist(self, key):
+        """Alias keys sharing the most trigrams with key."""
+        counts = Counter()
+        for gram in trigrams(key):
+            counts.update(self._grams.get(gram, ()))
+        return [k for k, _ in counts.most_common(SHORTLIST)]
+
+    def _scored(self, key):
+        matcher = difflib.SequenceMatcher(None, b=key)
+        scored = []
+        for candidate in self._shortlist(key):
+            matcher.set_seq1(candidate)
+            scored.append((matcher.ratio(), candidate))
+        scored.sort(reverse=True)
+        return scored
+
+    def _fuzzy(self, key):
+        scored = [s for s in self._scored(key)[:3] if s[0] >= FUZZY_CUTOFF]
+        if not scored:
+            return None
+        if len(scored) > 1 and scored[0][0] - scored[1][0] < FUZZY_MARGIN:
+            return None
+        targets = self.alias_map[scored[0][1]]
+        return next(iter(targets)) if len(targets) == 1 else None
+
+    def candidates(self, span, limit=5):
+        """
+        Locations span may refer to, best first, as (name, score) with
+        score 1.0 for an exact alias, MENTION_SCORE for a contained alias
+        and the fuzzy similarity otherwise.
+        """
+        key = _strip_filler(normalize(span))
+        if not key:
+            return []
+        best = {}
+
+        def offer(names, score):
+            for name in names:
+                if score > best.get(name, 0.0):
+                    best[name] = score
+
+        offer(self.alias_map.get(key, ()), 1.0)
+        for _, _, names in self.mentions(key):
+            offer(names, MENTION_SCORE)
+        for score, candidate in self._scored(key):
+            offer(self.alias_map[candidate], score)
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def lookup(self, name, min_score=FUZZY_CUTOFF, margin=FUZZY_MARGIN):
+        """
+        Canonical name for an extracted location name. Raises
+        UnknownLocation with ranked suggestions when no candidate is
+        both good enough and clearly ahead of the runner-up.
+        """
+        if name in self.names:
+            return name
+        ranked = self.candidates(name)
+        if ranked and ranked[0][1] >= min_score and (
+                len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= margin):
+            return ranked[0][0]
+        raise UnknownLocation(name, ranked)
+
+    def parse(self, text):
+        """
+        (start, end) for a navigation question, (None, end) for a "where
+        is" question, or None when the text is not confidently understood.
+        """
+        query = normalize(text)
+        for pattern in ROUTE_PATTERNS:
+            match = pattern.search(query)
+            if not match:
+                continue
+            start = self.resolve(match.group("start"))
+            end = self.resolve(match.group("end"))
+            if start and end:
+                return start, end
+        for pattern in WHERE_PATTERNS:
+            match = pattern.search(query)
+            if match:
+                end = self.resolve(match.group("end"))
+                return (None, end) if end else None
+        return None
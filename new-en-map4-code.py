@@ -1,6 +1,7 @@
 import json
 import re
 from neo4j import GraphDatabase
+from location_catalog import stamp_graph_version
 import math
 
 # --- STEP 1: NEO4J DATABASE CONFIGURATION ---
@@ -91,6 +92,8 @@ class EndeavorGraph:
             nodes = session.execute_read(self._get_all_location_nodes)
             self._create_near_relationships(nodes)
             print("Created :NEAR relationships.")
+            stamp_graph_version(session)
+            print("Stamped new graph version.")
 
     @staticmethod
     def _create_located_on_relationships(tx):
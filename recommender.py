@@ -1,80 +1,525 @@
-import psycopg2
-from datetime import datetime
-from endeavor_graph import EndeavorGraph
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from heapq import heappush, heappop
 
+from psycopg2 import OperationalError, errors
+from psycopg2.pool import ThreadedConnectionPool
+
+from bookings_partitions import is_partitioned
+from distance_table import DistanceTable
+from endeavor_graph import EndeavorGraph, grid_distance
+
+
+# Local development database, shared by the benchmark scripts
+PG_CONFIG = dict(
+    dbname="meeting_rooms",
+    user="postgres",
+    password="postgres",
+    host="localhost",
+    port=5432
+)
+
+# status is "booked", "slot_taken" (no_overlap conflict) or "invalid"
+# (unknown room, booking crossing a month on a partitioned table, ...).
+# alternatives holds (room_id, name, start, end) suggestions for conflicts.
+BookingResult = namedtuple(
+    "BookingResult",
+    "status booking_id room_id start_time end_time alternatives"
+)
+
+
+def average_distance(user_grids, grid, room_id=None, distance_table=None,
+                     metric="euclidean"):
+    """
+    Average distance from the participants to a room, or None. Cells the
+    DistanceTable covers are looked up there; anything else falls back to
+    the room's grid from Postgres.
+    """
+    distances = []
+    for user_grid in user_grids:
+        if distance_table is not None and \
+                distance_table.covers(user_grid, room_id):
+            # None here means unreachable in the walking graph
+            dist = distance_table.distance(user_grid, room_id, metric)
+        else:
+            dist = grid_distance(user_grid, grid)
+        if dist is not None:
+            distances.append(dist)
+    if not distances:
+        return None
+    return sum(distances) / len(distances)
+
+
+def rank_rooms(available_rooms, user_grids, top_k=3, distance_table=None,
+               metric="euclidean"):
+    """
+    Top-k rows of get_available_rooms() by average distance, as
+    (name, grid, dist, capacity, type). Shared by MeetingRoomRecommender
+    and the asyncio recommender so both rank the same way.
+    """
+    # Use min-heap to efficiently find top-k closest rooms
+    room_heap = []
+    for room_id, name, grid, capacity, type_ in available_rooms:
+        avg_dist = average_distance(user_grids, grid, room_id,
+                                    distance_table, metric)
+        if avg_dist is not None:
+            heappush(room_heap, (avg_dist, name, grid, capacity, type_))
+
+    recommendations = []
+    for _ in range(min(top_k, len(room_heap))):
+        dist, name, grid, capacity, type_ = heappop(room_heap)
+        recommendations.append((name, grid, dist, capacity, type_))
+    return recommendations
+
+
+def rank_earliest(free_slots, user_grids, duration, top_k=3,
+                  distance_table=None, metric="euclidean"):
+    """
+    Top-k rows of find_free_slots(), one per room at its earliest slot,
+    ranked by slot start and then average distance, as
+    (name, grid, dist, capacity, type, start, end).
+    """
+    slot_heap = []
+    seen_rooms = set()
+    for room_id, name, grid, capacity, type_, gap_start, _ in free_slots:
+        # Rows arrive ordered by gap_start, so the first one is earliest
+        if room_id in seen_rooms:
+            continue
+        seen_rooms.add(room_id)
+        avg_dist = average_distance(user_grids, grid, room_id,
+                                    distance_table, metric)
+        if avg_dist is not None:
+            heappush(slot_heap, (gap_start, avg_dist, name, grid,
+                                 capacity, type_))
+
+    recommendations = []
+    for _ in range(min(top_k, len(slot_heap))):
+        start, dist, name, grid, capacity, type_ = heappop(slot_heap)
+        recommendations.append((name, grid, dist, capacity, type_,
+                                start, start + duration))
+    return recommendations
+
 
 class PostgresBookingManager:
-    def __init__(self, dbname, user, password, host="localhost", port=5432):
-        self.conn = psycopg2.connect(
+    """
+    Thread-safe access to the meeting room database.
+
+    Connections come from a pool and are checked out for the duration of a
+    single call, so concurrent recommendation requests each get their own
+    transaction. Callers block (instead of failing) when all `maxconn`
+    connections are in use.
+
+    If `bookings` is month-partitioned (see bookings_partitions.py), every
+    query also bounds starts_at so the planner prunes untouched months.
+    """
+    def __init__(self, dbname, user, password, host="localhost", port=5432,
+                 minconn=1, maxconn=10, health_check_interval=30.0):
+        self.pool = ThreadedConnectionPool(
+            minconn, maxconn,
             dbname=dbname, user=user, password=password,
             host=host, port=port
         )
+        self.health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        with self.connection() as conn:
+            self.partitioned = is_partitioned(conn)
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.pool.closeall()
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a healthy connection out of the pool for one unit of work.
+        The transaction is committed on success and rolled back on error, so
+        the connection always goes back to the pool idle.
+        """
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                self._last_used[id(conn)] = time.monotonic()
+                self.pool.putconn(conn, close=bool(conn.closed))
+
+    def _checkout(self):
+        # After a server restart every idle connection may be dead, and a
+        # replacement is only trusted once it passes the same check. Each
+        # round drops one connection, so maxconn + 1 rounds reach a fresh one.
+        for _ in range(self.pool.maxconn + 1):
+            conn = self.pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            # Drop the broken connection; the pool opens a fresh one in its place.
+            self._last_used.pop(id(conn), None)
+            self.pool.putconn(conn, close=True)
+        raise OperationalError("no healthy connection in the pool")
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and \
+                time.monotonic() - last_used < self.health_check_interval:
+            return True
+        # Idle for a while: the server may have dropped it, so ping first.
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _pruning_filter(self):
+        """
+        Extra predicate for partitioned bookings b. Bookings never cross a
+        month boundary, so anything overlapping [%(start)s, %(end)s) starts
+        between the first of start's month and end.
+        """
+        if not self.partitioned:
+            return ""
+        return ("AND b.starts_at >= date_trunc('month', %(start)s::timestamp) "
+                "AND b.starts_at < %(end)s")
 
     def is_room_available(self, room_id, start_time: datetime, 
                          end_time: datetime):
-        query = """
-            SELECT COUNT(*) FROM bookings
-            WHERE room_id = %s AND timeslot && tsrange(%s, %s)
+        query = f"""
+            SELECT COUNT(*) FROM bookings b
+            WHERE b.room_id = %(room_id)s
+            AND b.timeslot && tsrange(%(start)s, %(end)s)
+            {self._pruning_filter()}
         """
-        with self.conn.cursor() as cur:
-            cur.execute(query, (room_id, start_time, end_time))
+        params = {"room_id": room_id, "start": start_time, "end": end_time}
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
             result = cur.fetchone()
             return result[0] == 0
 
-    def get_available_rooms(self, start_time: datetime, end_time: datetime):
-        query = """
+    def get_availability_matrix(self, room_ids: list[str],
+                                windows: list[tuple[datetime, datetime]]):
+        """
+        Checks every room against every time window in one round trip.
+        Returns one row per room id with one bool per window (True = free).
+        Only the busy (room, window) pairs come back from the database; the
+        lookups are served by the gist index behind the no_overlap constraint.
+        """
+        matrix = [[True] * len(windows) for _ in room_ids]
+        if not room_ids or not windows:
+            return matrix
+
+        query = f"""
+            SELECT r.idx, w.idx
+            FROM unnest(%(room_ids)s::text[])
+                WITH ORDINALITY AS r(room_id, idx)
+            CROSS JOIN unnest(%(starts)s::timestamp[], %(ends)s::timestamp[])
+                WITH ORDINALITY AS w(start_time, end_time, idx)
+            WHERE EXISTS (
+                SELECT 1 FROM bookings b
+                WHERE b.room_id = r.room_id
+                AND b.timeslot && tsrange(w.start_time, w.end_time)
+                {self._pruning_filter()}
+            )
+        """
+        starts = [start for start, _ in windows]
+        ends = [end for _, end in windows]
+        # Pruning bounds cover the union of all windows
+        params = {"room_ids": list(room_ids), "starts": starts, "ends": ends,
+                  "start": min(starts), "end": max(ends)}
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            for room_idx, window_idx in cur.fetchall():
+                matrix[room_idx - 1][window_idx - 1] = False
+        return matrix
+
+    def get_available_rooms(self, start_time: datetime, end_time: datetime,
+                            min_capacity=None, room_types=None, levels=None):
+        """
+        Rooms with no booking overlapping [start_time, end_time).
+        Optional capacity / type / level filters are applied in SQL so that
+        unsuitable rooms never reach the distance scoring.
+        """
+        filters, params = self._room_filters(min_capacity, room_types, levels)
+        query = f"""
             SELECT r.room_id, r.name, r.grid, r.capacity, r.type
             FROM rooms r
             WHERE NOT EXISTS (
                 SELECT 1 FROM bookings b
                 WHERE b.room_id = r.room_id
-                AND b.timeslot && tsrange(%s, %s)
+                AND b.timeslot && tsrange(%(start)s, %(end)s)
+                {self._pruning_filter()}
+            )
+            {filters}
+        """
+        params.update(start=start_time, end=end_time)
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    @staticmethod
+    def _room_filters(min_capacity=None, room_types=None, levels=None,
+                      room_ids=None):
+        """
+        Builds the optional `AND ...` filters on rooms r. Only the filters
+        actually given are emitted, so the planner can use the
+        (type, level, capacity) index for whichever ones are present.
+        """
+        clauses, params = [], {}
+        if min_capacity is not None:
+            # Capacity is not in the map data yet, so unknown (NULL) capacity
+            # counts as big enough rather than excluding the room
+            clauses.append("AND (r.capacity IS NULL "
+                           "OR r.capacity >= %(min_capacity)s)")
+            params["min_capacity"] = min_capacity
+        if room_types:
+            # importData.py stores types without spaces, e.g. ConferenceRoom
+            clauses.append("AND r.type = ANY(%(room_types)s)")
+            params["room_types"] = [t.replace(" ", "") for t in room_types]
+        if levels:
+            clauses.append("AND r.level = ANY(%(levels)s)")
+            params["levels"] = list(levels)
+        if room_ids:
+            clauses.append("AND r.room_id = ANY(%(room_ids)s)")
+            params["room_ids"] = list(room_ids)
+        return "\n            ".join(clauses), params
+
+    def find_free_slots(self, window_start: datetime, window_end: datetime,
+                        duration: timedelta, min_capacity=None,
+                        room_types=None, levels=None, room_ids=None):
+        """
+        Finds every free gap of at least `duration` per room inside
+        [window_start, window_end) with a single window-function query.
+        Rows are (room_id, name, grid, capacity, type, gap_start, gap_end),
+        ordered by gap_start. Room filters work as in get_available_rooms.
+        """
+        filters, params = self._room_filters(min_capacity, room_types, levels,
+                                             room_ids)
+        query = f"""
+            WITH candidates AS (
+                SELECT r.room_id, r.name, r.grid, r.capacity, r.type
+                FROM rooms r
+                WHERE TRUE
+                {filters}
+            ),
+            busy AS (
+                SELECT b.room_id,
+                       greatest(lower(b.timeslot), %(start)s::timestamp)
+                           AS busy_start,
+                       least(upper(b.timeslot), %(end)s::timestamp)
+                           AS busy_end
+                FROM bookings b
+                JOIN candidates c ON c.room_id = b.room_id
+                WHERE b.timeslot && tsrange(%(start)s, %(end)s)
+                {self._pruning_filter()}
+                UNION ALL
+                -- zero-length sentinel so the gap before window_end counts
+                SELECT c.room_id, %(end)s::timestamp, %(end)s::timestamp
+                FROM candidates c
+            ),
+            gaps AS (
+                SELECT room_id,
+                       coalesce(max(busy_end) OVER (
+                           PARTITION BY room_id
+                           ORDER BY busy_start, busy_end
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ), %(start)s::timestamp) AS gap_start,
+                       busy_start AS gap_end
+                FROM busy
             )
+            SELECT c.room_id, c.name, c.grid, c.capacity, c.type,
+                   g.gap_start, g.gap_end
+            FROM gaps g
+            JOIN candidates c ON c.room_id = g.room_id
+            WHERE g.gap_end - g.gap_start >= %(duration)s
+            ORDER BY g.gap_start, c.room_id
         """
-        with self.conn.cursor() as cur:
-            cur.execute(query, (start_time, end_time))
+        params.update(start=window_start, end=window_end, duration=duration)
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
             return cur.fetchall()
 
+    def _insert_booking_sql(self):
+        if self.partitioned:
+            return """
+                INSERT INTO bookings (room_id, timeslot, starts_at,
+                                      booked_by, title)
+                VALUES (%(room_id)s, tsrange(%(start)s, %(end)s, '[)'),
+                        %(start)s, %(booked_by)s, %(title)s)
+                RETURNING booking_id
+            """
+        return """
+            INSERT INTO bookings (room_id, timeslot, booked_by, title)
+            VALUES (%(room_id)s, tsrange(%(start)s, %(end)s, '[)'),
+                    %(booked_by)s, %(title)s)
+            RETURNING booking_id
+        """
+
+    def book_room(self, room_id, start_time: datetime, end_time: datetime,
+                  booked_by, title="", suggestions=3):
+        """
+        Books a room atomically. The no_overlap exclusion constraint decides
+        conflicts, so there is no check-then-insert race: a concurrent
+        booking of the same slot comes back as "slot_taken" together with
+        up to `suggestions` alternatives.
+        """
+        params = {"room_id": room_id, "start": start_time, "end": end_time,
+                  "booked_by": booked_by, "title": title}
+        try:
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.execute(self._insert_booking_sql(), params)
+                booking_id = cur.fetchone()[0]
+        except errors.ExclusionViolation:
+            alternatives = self.suggest_alternatives(
+                room_id, start_time, end_time, suggestions
+            )
+            return BookingResult("slot_taken", None, room_id, start_time,
+                                 end_time, alternatives)
+        except (errors.CheckViolation, errors.ForeignKeyViolation):
+            return BookingResult("invalid", None, room_id, start_time,
+                                 end_time, [])
+        return BookingResult("booked", booking_id, room_id, start_time,
+                             end_time, [])
+
+    def book_rooms(self, requests, suggestions=3):
+        """
+        Books many rooms on one connection and in one transaction. Each
+        request is a dict of book_room() arguments. Every insert runs under
+        a savepoint, so a conflict only rolls back that booking; results
+        come back in request order.
+        """
+        insert = self._insert_booking_sql()
+        results = []
+        with self.connection() as conn, conn.cursor() as cur:
+            # Reusing one savepoint name (released before the next insert)
+            # keeps a single subtransaction open instead of one per row.
+            prefix = "SAVEPOINT booking;"
+            for request in requests:
+                params = {"title": "", **request}
+                params["start"] = params.pop("start_time")
+                params["end"] = params.pop("end_time")
+                try:
+                    cur.execute(prefix + insert, params)
+                    status, booking_id = "booked", cur.fetchone()[0]
+                except errors.ExclusionViolation:
+                    cur.execute("ROLLBACK TO SAVEPOINT booking")
+                    status, booking_id = "slot_taken", None
+                except (errors.CheckViolation, errors.ForeignKeyViolation):
+                    cur.execute("ROLLBACK TO SAVEPOINT booking")
+                    status, booking_id = "invalid", None
+                prefix = "RELEASE SAVEPOINT booking; SAVEPOINT booking;"
+                results.append(BookingResult(
+                    status, booking_id, params["room_id"], params["start"],
+                    params["end"], []
+                ))
+
+        # Suggestions are only looked up after the batch has committed
+        for i, result in enumerate(results):
+            if result.status == "slot_taken":
+                alternatives = self.suggest_alternatives(
+                    result.room_id, result.start_time, result.end_time,
+                    suggestions
+                )
+                results[i] = result._replace(alternatives=alternatives)
+        return results
+
+    def suggest_alternatives(self, room_id, start_time: datetime,
+                             end_time: datetime, limit=3, search_hours=8):
+        """
+        Alternatives for a taken slot, as (room_id, name, start, end):
+        first the same room at its next free slots of the same length
+        (within `search_hours`), then other rooms on the same level that are
+        at least as large and free at the requested time.
+        """
+        duration = end_time - start_time
+        same_room = self.find_free_slots(
+            start_time, start_time + timedelta(hours=search_hours), duration,
+            room_ids=[room_id]
+        )
+        alternatives = [
+            (rid, name, gap_start, gap_start + duration)
+            for rid, name, _, _, _, gap_start, _ in same_room[:limit]
+        ]
+        if len(alternatives) >= limit:
+            return alternatives
+
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT level, capacity FROM rooms WHERE room_id = %s",
+                        (room_id,))
+            row = cur.fetchone()
+        if row is None:
+            return alternatives
+        level, capacity = row
+        other_rooms = self.get_available_rooms(
+            start_time, end_time, min_capacity=capacity,
+            levels=[level] if level is not None else None
+        )
+        for rid, name, _, _, _ in sorted(other_rooms, key=lambda r: r[3] or 0):
+            if len(alternatives) >= limit:
+                break
+            if rid != room_id:
+                alternatives.append((rid, name, start_time, end_time))
+        return alternatives
+
 
 class MeetingRoomRecommender:
+    """
+    Ranks free rooms by average distance to the participants' grid cells.
+    With a DistanceTable, scoring is array lookups in the precomputed table
+    (`metric` is "euclidean" or "walking"); without one, grid distances are
+    computed on the fly from the grids stored in Postgres.
+    """
     def __init__(self, graph: EndeavorGraph, 
-                 booking_manager: PostgresBookingManager):
+                 booking_manager: PostgresBookingManager,
+                 distance_table: DistanceTable = None, metric="euclidean"):
         self.graph = graph
         self.booking_manager = booking_manager
+        self.distance_table = distance_table
+        self.metric = metric
 
     def recommend(self, user_grids: list[str], start_time: datetime, 
-                  end_time: datetime, top_k=3):
+                  end_time: datetime, top_k=3, attendees=None,
+                  room_types=None, levels=None):
+        """
+        Top-k free rooms by average distance to the participants.
+        `attendees`, `room_types` and `levels` narrow the candidates in SQL
+        before any distance is computed.
+        """
         available_rooms = self.booking_manager.get_available_rooms(
-            start_time, end_time
+            start_time, end_time, min_capacity=attendees,
+            room_types=room_types, levels=levels
         )
         if not available_rooms:
             return []
+        if self.distance_table is not None:
+            self.distance_table.ensure_fresh()
+        return rank_rooms(available_rooms, user_grids, top_k,
+                          self.distance_table, self.metric)
+
+    def recommend_earliest(self, user_grids: list[str], window_start: datetime,
+                           window_end: datetime, duration: timedelta, top_k=3,
+                           attendees=None, room_types=None, levels=None):
+        """
+        Search mode for "any time between window_start and window_end".
+        Each room is offered at its earliest free slot of `duration`; the
+        (room, slot) pairs are ranked by slot start, then average distance.
+        Accepts the same room filters as recommend().
+        """
+        free_slots = self.booking_manager.find_free_slots(
+            window_start, window_end, duration, min_capacity=attendees,
+            room_types=room_types, levels=levels
+        )
 
-        # Use min-heap to efficiently find top-k closest rooms
-        room_heap = []
-        
-        for room in available_rooms:
-            room_id, name, grid, capacity, type_ = room
-            distances = []
-            
-            # Calculate distance from each user grid to this room
-            for user_grid in user_grids:
-                dist = self.graph._calculate_grid_distance(user_grid, grid)
-                if dist is not None:
-                    distances.append(dist)
-            
-            # If we have valid distances, calculate average and add to heap
-            if distances:
-                avg_dist = sum(distances) / len(distances)
-                heappush(room_heap, (avg_dist, name, grid, capacity, type_))
-        
-        # Extract top-k rooms from heap
-        recommendations = []
-        for _ in range(min(top_k, len(room_heap))):
-            if room_heap:
-                dist, name, grid, capacity, type_ = heappop(room_heap)
-                recommendations.append((name, grid, dist, capacity, type_))
-        
-        return recommendations
-    
+        if self.distance_table is not None:
+            self.distance_table.ensure_fresh()
+        return rank_earliest(free_slots, user_grids, duration, top_k,
+                             self.distance_table, self.metric)
@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from recommender import PostgresBookingManager, MeetingRoomRecommender
+from distance_table import DistanceTable
 from endeavor_graph import EndeavorGraph
 
 # === initialize database and graph interface ===
@@ -8,7 +9,9 @@ pg_manager = PostgresBookingManager(
     user="postgres",
     password="postgres",
     host="localhost",
-    port=5432
+    port=5432,
+    minconn=1,
+    maxconn=5
 )
 
 graph = EndeavorGraph(
@@ -17,7 +20,13 @@ graph = EndeavorGraph(
     password="neo4j123"
 )
 
-recommender = MeetingRoomRecommender(graph, pg_manager)
+# Precomputed cell -> room distances, rebuilt when en-map.json changes
+distance_table = DistanceTable.load_or_build(
+    "en-map.json", "distance_table.bin", driver=graph.driver
+)
+
+recommender = MeetingRoomRecommender(graph, pg_manager,
+                                     distance_table=distance_table)
 
 # === input example ===
 user_grids = ["G2", "H2"]
@@ -25,6 +34,8 @@ start_time = datetime.strptime("2025-06-26 13:00", "%Y-%m-%d %H:%M")
 end_time = datetime.strptime("2025-06-26 14:00", "%Y-%m-%d %H:%M")
 
 # === get results ===
+# No room has a capacity until capacities are imported, so no attendees
+# filter here
 results = recommender.recommend(user_grids, start_time, end_time, top_k=3)
 
 # === print results ===
@@ -33,5 +44,19 @@ for name, grid, dist, cap, typ in results:
     print(f"- {name} (Grid: {grid}, Distance: {dist:.2f}, "
           f"Capacity: {cap}, Type: {typ})")
 
-# === close Neo4j connection ===
+# === flexible search: any 45 minutes in the next 3 hours ===
+window_start = start_time
+window_end = start_time + timedelta(hours=3)
+slots = recommender.recommend_earliest(
+    user_grids, window_start, window_end, timedelta(minutes=45), top_k=3
+)
+
+print("Earliest free slots near participants:")
+for name, grid, dist, cap, typ, slot_start, slot_end in slots:
+    print(f"- {name} {slot_start:%H:%M}-{slot_end:%H:%M} (Grid: {grid}, "
+          f"Distance: {dist:.2f}, Capacity: {cap}, Type: {typ})")
+
+# === close Neo4j connection and Postgres pool ===
 graph.close()
+pg_manager.close()
+distance_table.close()
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+from datetime import datetime
+
+import psycopg2
+
+from bookings_partitions import ensure_partitions, is_partitioned, next_month
+from copyImport import PG_DSN, READ_SIZE, CopyStream, copy_line, iter_records
+
+# Idempotent incremental sync of bookings from an upstream calendar.
+#
+# Each upstream booking carries a stable key (external_id, or id); a record
+# with "status": "cancelled" removes the booking. The batch is COPY'd into
+# a temp staging table and diffed against bookings by external_id, then in
+# one transaction:
+#   1. cancelled bookings are deleted (with --window-start/--window-end the
+#      batch is a full snapshot of that window, so bookings in the window
+#      that are missing from it are deleted too)
+#   2. bookings whose room, time, owner or title changed are deleted and
+#      re-inserted with their booking_id and created_at
+#   3. bookings not seen before are inserted
+# Unchanged rows are not touched, so rerunning the same batch is a no-op.
+# no_overlap is checked row by row and is not deferrable, so every delete
+# (cancelled and changed rows) runs before any insert: bookings that swap
+# or shift slots within one batch never collide with their own old rows.
+# If a batch repeats an external_id, its last record wins.
+#
+# external_id cannot be UNIQUE on the month-partitioned bookings table (a
+# unique index there must include starts_at), so concurrent syncs are
+# serialized with a transaction-level advisory lock instead; otherwise two
+# of them could both see a booking as new and insert it twice.
+#
+#   python syncBookings.py upstream.jsonl
+#   python syncBookings.py upstream.jsonl --window-start "2025-06-26 00:00" \
+#       --window-end "2025-06-27 00:00"
+
+SYNC_LOCK = "SELECT pg_advisory_xact_lock(hashtext('syncBookings'))"
+
+SYNC_SCHEMA = """
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS external_id TEXT;
+CREATE INDEX IF NOT EXISTS bookings_external_id_idx ON bookings (external_id);
+"""
+
+
+def ensure_sync_schema(conn):
+    """
+    Adds external_id and its index if missing, in a transaction of its own.
+    ALTER TABLE takes an ACCESS EXCLUSIVE lock even when the column already
+    exists, so it only runs when the catalog says something is missing and
+    is committed before the sync starts, never held through the merge.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXISTS (
+                       SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'bookings'
+                       AND column_name = 'external_id'
+                       AND table_schema = current_schema()),
+                   to_regclass('bookings_external_id_idx') IS NOT NULL
+        """)
+        has_column, has_index = cur.fetchone()
+        if not (has_column and has_index):
+            cur.execute(SYNC_SCHEMA)
+    conn.commit()
+
+
+def external_key(record):
+    """
+    The record's stable key. Upstreams without ids fall back to a hash of
+    room, start and owner; a rescheduled booking then shows up as a
+    cancellation plus a new booking (snapshot mode only).
+    """
+    key = record.get("external_id") or record.get("id")
+    if key:
+        return str(key)
+    raw = f"{record['room_id']}|{record['start']}|{record.get('booked_by')}"
+    return "sha1:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def staging_lines(records):
+    for b in records:
+        yield copy_line(
+            external_key(b), b["room_id"],
+            f"[\"{b['start']}\",\"{b['end']}\")",
+            b.get("booked_by"), b.get("title", ""),
+            "t" if b.get("status") == "cancelled" else "f"
+        )
+
+
+def sync_bookings(conn, records, window_start=None, window_end=None):
+    """
+    Applies one upstream batch. Returns a dict of row counts per action.
+    The caller commits; nothing is applied if any step fails.
+    """
+    partitioned = is_partitioned(conn)
+    stream = CopyStream(staging_lines(records))
+    counts = {}
+    with conn.cursor() as cur:
+        cur.execute(SYNC_LOCK)
+        # seq keeps the batch order so duplicates resolve to the last record
+        cur.execute("""
+            CREATE TEMP TABLE bookings_sync_raw (
+                seq         BIGSERIAL,
+                external_id TEXT NOT NULL,
+                room_id     TEXT NOT NULL,
+                timeslot    TSRANGE NOT NULL,
+                booked_by   TEXT,
+                title       TEXT,
+                cancelled   BOOLEAN NOT NULL
+            ) ON COMMIT DROP
+        """)
+        cur.copy_expert(
+            "COPY bookings_sync_raw (external_id, room_id, timeslot, "
+            "booked_by, title, cancelled) FROM STDIN", stream, size=READ_SIZE
+        )
+        counts["received"] = stream.rows
+        cur.execute("""
+            CREATE TEMP TABLE bookings_sync ON COMMIT DROP AS
+            SELECT DISTINCT ON (external_id)
+                   external_id, room_id, timeslot, booked_by, title, cancelled
+            FROM bookings_sync_raw
+            ORDER BY external_id, seq DESC
+        """)
+        cur.execute("ANALYZE bookings_sync")
+
+        cur.execute("""
+            DELETE FROM bookings b
+            USING bookings_sync s
+            WHERE b.external_id = s.external_id AND s.cancelled
+        """)
+        counts["cancelled"] = cur.rowcount
+
+        if window_start is not None and window_end is not None:
+            # starts_at lets the planner prune partitions outside the window
+            pruning = ("AND b.starts_at >= %(start)s AND b.starts_at < %(end)s"
+                       if partitioned else "")
+            cur.execute(f"""
+                DELETE FROM bookings b
+                WHERE b.external_id IS NOT NULL
+                AND lower(b.timeslot) >= %(start)s
+                AND lower(b.timeslot) < %(end)s
+                {pruning}
+                AND NOT EXISTS (
+                    SELECT 1 FROM bookings_sync s
+                    WHERE s.external_id = b.external_id
+                )
+            """, {"start": window_start, "end": window_end})
+            counts["cancelled"] += cur.rowcount
+
+        if partitioned:
+            cur.execute("SELECT min(lower(timeslot)), max(lower(timeslot)) "
+                        "FROM bookings_sync WHERE NOT cancelled")
+            first, last = cur.fetchone()
+            if first is not None:
+                ensure_partitions(conn, first, next_month(last))
+
+        # Changed bookings: an in-place UPDATE would check no_overlap per
+        # row against rows the same statement has not moved yet, so a swap
+        # of two slots would fail. Delete them all, then insert them back.
+        old_starts_at = ", b.starts_at AS old_starts_at" if partitioned else ""
+        cur.execute(f"""
+            CREATE TEMP TABLE bookings_sync_changed ON COMMIT DROP AS
+            SELECT b.booking_id, b.created_at{old_starts_at}, s.external_id,
+                   s.room_id, s.timeslot, s.booked_by, s.title
+            FROM bookings b
+            JOIN bookings_sync s ON s.external_id = b.external_id
+            WHERE NOT s.cancelled
+            AND (b.room_id, b.timeslot, b.booked_by, b.title)
+                IS DISTINCT FROM (s.room_id, s.timeslot, s.booked_by, s.title)
+        """)
+        same_row = " AND b.starts_at = c.old_starts_at" if partitioned else ""
+        cur.execute(f"""
+            DELETE FROM bookings b
+            USING bookings_sync_changed c
+            WHERE b.booking_id = c.booking_id{same_row}
+        """)
+
+        columns = "external_id, room_id, timeslot, booked_by, title"
+        values = "s.external_id, s.room_id, s.timeslot, s.booked_by, s.title"
+        if partitioned:
+            columns += ", starts_at"
+            values += ", lower(s.timeslot)"
+        cur.execute(f"""
+            INSERT INTO bookings (booking_id, created_at, {columns})
+            SELECT s.booking_id, s.created_at, {values}
+            FROM bookings_sync_changed s
+        """)
+        counts["updated"] = cur.rowcount
+
+        cur.execute(f"""
+            INSERT INTO bookings ({columns})
+            SELECT {values}
+            FROM bookings_sync s
+            WHERE NOT s.cancelled
+            AND NOT EXISTS (
+                SELECT 1 FROM bookings b WHERE b.external_id = s.external_id
+            )
+        """)
+        counts["inserted"] = cur.rowcount
+    return counts
+
+
+def parse_time(value):
+    return datetime.strptime(value, "%Y-%m-%d %H:%M") if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("batch", help="upstream bookings, JSON or JSON Lines")
+    parser.add_argument("--window-start",
+                        help="snapshot window start, 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--window-end",
+                        help="snapshot window end, 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--dsn", default=PG_DSN)
+    args = parser.parse_args()
+
+    with psycopg2.connect(args.dsn) as conn:
+        ensure_sync_schema(conn)
+        counts = sync_bookings(conn, iter_records(args.batch),
+                               parse_time(args.window_start),
+                               parse_time(args.window_end))
+        conn.commit()
+    print(f"Received {counts['received']}: inserted {counts['inserted']}, "
+          f"updated {counts['updated']}, cancelled {counts['cancelled']}.")
+
+
+if __name__ == "__main__":
+    main()
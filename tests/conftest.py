@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat scripts at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def pg_conn():
+    """Connection to a scratch database; every test is rolled back."""
+    dsn = os.getenv("WAYFINDER_TEST_PG_DSN")
+    if not dsn:
+        pytest.skip("set WAYFINDER_TEST_PG_DSN to run against Postgres")
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(dsn)
+    yield conn
+    conn.rollback()
+    conn.close()
@@ -0,0 +1,28 @@
+import json
+
+from batch_navigate import compact_output, finished_ids
+from latency_stats import percentile
+
+
+def test_compact_output_keeps_latest_result_per_id(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    lines = [
+        {"id": "1", "status": "error", "error": "timed out"},
+        {"id": "2", "status": "ok"},
+        {"id": "1", "status": "ok"},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in lines)
+                    + '{"id": "3", "sta')  # interrupted mid-line
+    compact_output(str(path))
+    results = [json.loads(line) for line in path.read_text().splitlines()]
+    assert results == [{"id": "1", "status": "ok"}, {"id": "2", "status": "ok"}]
+    assert finished_ids(str(path), retry_errors=True) == {"1", "2"}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) != percentile([], 50)  # nan
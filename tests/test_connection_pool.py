@@ -0,0 +1,67 @@
+import pytest
+from psycopg2 import OperationalError
+
+from recommender import PostgresBookingManager
+
+
+class FakeConn:
+    def __init__(self, alive):
+        self.alive = alive
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        if not self.alive:
+            raise OperationalError("server closed the connection")
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """Hands out idle connections first, then opens new ones."""
+    def __init__(self, idle, maxconn, new_alive=True):
+        self.idle = list(idle)
+        self.maxconn = maxconn
+        self.new_alive = new_alive
+        self.discarded = []
+
+    def getconn(self):
+        return self.idle.pop(0) if self.idle else FakeConn(self.new_alive)
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = True
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+
+def make_manager(pool):
+    manager = PostgresBookingManager.__new__(PostgresBookingManager)
+    manager.pool = pool
+    manager.health_check_interval = 30.0
+    manager._last_used = {}
+    return manager
+
+
+def test_checkout_skips_every_dead_idle_connection():
+    pool = FakePool([FakeConn(False) for _ in range(3)], maxconn=3)
+    conn = make_manager(pool)._checkout()
+    assert conn.alive and not conn.closed
+    assert len(pool.discarded) == 3
+
+
+def test_checkout_gives_up_when_no_connection_answers():
+    pool = FakePool([FakeConn(False)], maxconn=2, new_alive=False)
+    with pytest.raises(OperationalError):
+        make_manager(pool)._checkout()
+    assert len(pool.discarded) == 3
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import copyImport
+from copyImport import CopyStream, copy_line, iter_records
+
+RECORDS = [{"id": f"r{i}", "name": f"Room {i}", "note": "x" * (i * 7)}
+           for i in range(40)]
+
+
+@pytest.fixture(params=[1 << 16, 16], ids=["one-read", "many-reads"])
+def read_size(request, monkeypatch):
+    # A tiny READ_SIZE makes every record straddle read boundaries
+    monkeypatch.setattr(copyImport, "READ_SIZE", request.param)
+
+
+def write(tmp_path, text):
+    path = tmp_path / "records.json"
+    path.write_text(text)
+    return str(path)
+
+
+def test_json_array(tmp_path, read_size):
+    path = write(tmp_path, "\n  " + json.dumps(RECORDS, indent=2) + "\n")
+    assert list(iter_records(path)) == RECORDS
+
+
+def test_empty_json_array(tmp_path, read_size):
+    assert list(iter_records(write(tmp_path, " [ ] "))) == []
+
+
+def test_unterminated_json_array(tmp_path, read_size):
+    path = write(tmp_path, json.dumps(RECORDS)[:-1])
+    with pytest.raises(ValueError):
+        list(iter_records(path))
+
+
+def test_json_lines_with_blank_lines(tmp_path, read_size):
+    lines = [json.dumps(r) for r in RECORDS]
+    text = "\n\n".join(lines[:20]) + "\n   \n" + "\r\n".join(lines[20:])
+    # No newline after the last record
+    assert list(iter_records(write(tmp_path, text))) == RECORDS
+
+
+def test_copy_line_escapes_special_characters():
+    line = copy_line("a\tb", "two\nlines", "back\\slash", "cr\r", None, 3, "")
+    assert line == "a\\tb\ttwo\\nlines\tback\\\\slash\tcr\\r\t\\N\t3\t\n"
+    # Escaped values never add extra fields or rows
+    assert line.count("\t") == 6 and line.count("\n") == 1
+
+
+def test_copy_stream_reads_in_pieces():
+    lines = [copy_line(i, f"room {i}") for i in range(100)]
+    stream = CopyStream(lines)
+    pieces = iter(lambda: stream.read(7), "")
+    assert "".join(pieces) == "".join(lines)
+    assert stream.rows == 100
@@ -0,0 +1,40 @@
+from endeavor_rag_directory import EndeavorRAG
+
+
+def make_rag():
+    return EndeavorRAG(None, None, None, None, driver=object(), llm=object())
+
+
+def test_parse_grid_handles_missing_grid():
+    rag = make_rag()
+    assert rag.parse_grid("AB12") == (28, 12)
+    assert rag.parse_grid(None) is None
+    assert rag.parse_grid("") is None
+
+
+def test_render_directions_with_gridless_hop():
+    nodes = [
+        {"name": "Alien", "level": 1, "grid": "A1"},
+        {"name": "Hallway", "level": 1, "grid": "A3"},
+        {"name": "Lift Lobby", "level": 1, "grid": None},
+        {"name": "Cafeteria", "level": 1, "grid": "C3"},
+    ]
+    assert make_rag().render_directions_local(nodes).splitlines() == [
+        "1. Start at 'Alien' (Level 1, grid A1).",
+        "2. Head east for about 3 meters, to 'Hallway'.",
+        "3. Continue to 'Lift Lobby'.",
+        "4. Continue to 'Cafeteria'.",
+        "5. You have arrived at 'Cafeteria'.",
+    ]
+
+
+def test_render_directions_from_gridless_start():
+    nodes = [
+        {"name": "Reception", "level": 0},
+        {"name": "Lobby", "level": 0, "grid": "B2"},
+    ]
+    assert make_rag().render_directions_local(nodes).splitlines() == [
+        "1. Start at 'Reception' (Level 0).",
+        "2. Continue to 'Lobby'.",
+        "3. You have arrived at 'Lobby'.",
+    ]
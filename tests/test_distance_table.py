@@ -0,0 +1,86 @@
+import json
+import math
+import os
+import threading
+
+import distance_table
+from distance_table import DistanceTable, _walking_row
+
+# a -- b -- c along two 4.0 edges; the room c is only reachable via b
+NODE_GRIDS = {"a": (1, 1), "b": (5, 1), "c": (5, 5)}
+ADJACENCY = {
+    "a": [("b", 4.0)],
+    "b": [("a", 4.0), ("c", 4.0)],
+    "c": [("b", 4.0)],
+}
+
+
+def test_walking_follows_the_graph_around_a_detour():
+    (walking,) = _walking_row((1, 1), NODE_GRIDS, ADJACENCY, ["c"])
+    euclidean = math.hypot(5 - 1, 5 - 1)
+    assert walking == 8.0
+    assert walking > euclidean
+
+
+def test_walking_adds_the_step_to_the_nearest_location():
+    (walking,) = _walking_row((1, 2), NODE_GRIDS, ADJACENCY, ["c"])
+    assert walking == 9.0
+
+
+def test_unreachable_room_is_nan():
+    (walking,) = _walking_row((1, 1), NODE_GRIDS, {}, ["c"])
+    assert math.isnan(walking)
+
+
+def write_map(path, room_grid):
+    locations = [
+        {"id": "hall", "type": "Hallway", "location": {"grid": "A1"}},
+        {"id": "room", "type": "Conference Room",
+         "location": {"grid": room_grid}},
+        {"id": "corner", "type": "Hallway", "location": {"grid": "J10"}},
+    ]
+    with open(path, "w") as f:
+        json.dump(locations, f)
+
+
+def test_concurrent_ensure_fresh_rebuilds_once(tmp_path, monkeypatch):
+    map_path = str(tmp_path / "map.json")
+    table_path = str(tmp_path / "table.bin")
+    write_map(map_path, "A2")
+    table = DistanceTable.load_or_build(map_path, table_path)
+    assert table.distance("A1", "room") == 1.0
+
+    builds = []
+    real_build = distance_table.build_distance_table
+
+    def counting_build(*args):
+        builds.append(args)
+        return real_build(*args)
+    monkeypatch.setattr(distance_table, "build_distance_table", counting_build)
+
+    errors, seen = [], []
+    start = threading.Barrier(9)
+
+    def reader():
+        try:
+            start.wait()
+            for _ in range(200):
+                table.ensure_fresh()
+                seen.append(table.distance("A1", "room"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    write_map(map_path, "A5")
+    start.wait()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(builds) == 1
+    assert set(seen) <= {1.0, 4.0}
+    assert table.distance("A1", "room") == 4.0
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+    table.close()
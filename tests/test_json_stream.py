@@ -0,0 +1,65 @@
+from json_stream import JSONObjectExtractor, extract_json_object
+
+ANSWER = {"start": "Alien", "end": "Cafeteria"}
+
+
+def feed_chunks(chunks):
+    """Feeds chunks in order; returns (result, index of the closing chunk)."""
+    extractor = JSONObjectExtractor()
+    for i, chunk in enumerate(chunks):
+        if extractor.feed(chunk):
+            return extractor.result, i
+    return extractor.result, None
+
+
+def test_object_split_across_chunks():
+    text = '{"start": "Alien", "end": "Cafeteria"}'
+    assert feed_chunks(list(text)) == (ANSWER, len(text) - 1)
+    assert feed_chunks(['{"sta', 'rt": "Alien", "e', 'nd": "Cafeteria"', '}']) \
+        == (ANSWER, 3)
+
+
+def test_braces_inside_strings_are_not_counted():
+    reply = '{"start": "Room {A}", "end": "}Lobby{"}'
+    assert extract_json_object(reply) == {"start": "Room {A}",
+                                          "end": "}Lobby{"}
+
+
+def test_escaped_quotes_inside_strings():
+    reply = r'{"start": "The \"Alien\" }", "end": "C:\\Bar"}'
+    assert extract_json_object(reply) == {"start": 'The "Alien" }',
+                                          "end": "C:\\Bar"}
+
+
+def test_leading_prose_and_code_fence():
+    reply = ('Sure! Here is the {answer} you asked for:\n'
+             '```json\n{"start": "Alien", "end": "Cafeteria"}\n```\n')
+    assert extract_json_object(reply) == ANSWER
+
+
+def test_think_block_is_skipped_even_when_split():
+    chunks = ["<thi", 'nk>maybe {"start": "X", "end": "Y"}</th',
+              'ink>', '{"start": "Alien", "end": "Cafeteria"}']
+    assert feed_chunks(chunks) == (ANSWER, 3)
+
+
+def test_first_complete_object_wins_over_a_trailing_one():
+    extractor = JSONObjectExtractor()
+    reply = ('{"start": "Alien", "end": "Cafeteria"} or maybe '
+             '{"start": "Bridge", "end": "Galley"}')
+    assert extractor.feed(reply) == ANSWER
+    assert extractor.feed('{"start": "Other", "end": "Place"}') == ANSWER
+
+
+def test_objects_without_the_required_keys_are_skipped():
+    reply = '{"note": "thinking"} {"start": "Alien", "end": "Cafeteria"}'
+    assert extract_json_object(reply) == ANSWER
+
+
+def test_single_quoted_dict():
+    assert extract_json_object("{'start': 'Alien', 'end': 'Cafeteria'}") \
+        == ANSWER
+
+
+def test_incomplete_object_gives_none():
+    assert extract_json_object('{"start": "Alien", "end": ') is None
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from llm_router import AsyncLLMRouter
+
+MESSAGES = [{"role": "user", "content": "alien to cafeteria"}]
+
+
+class FakeResponse:
+    """Streamed completion: waits `ttft` seconds, then yields `tokens`."""
+    def __init__(self, tokens, ttft):
+        self.tokens = tokens
+        self.ttft = ttft
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        await asyncio.sleep(self.ttft)
+        for token in self.tokens:
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, tokens=("a", "b", "c"), ttft=0.0, fail=False):
+        self.tokens, self.ttft, self.fail = tokens, ttft, fail
+        self.responses = []
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream, **params):
+        if self.fail:
+            raise ConnectionError(f"{model} is down")
+        response = FakeResponse(self.tokens, self.ttft)
+        self.responses.append(response)
+        return response
+
+    async def close(self):
+        pass
+
+
+def make_router(primary, secondary, ttft_deadline=0.05):
+    clients = {"http://primary/v1": primary, "http://secondary/v1": secondary}
+    routes = {"parse": {"ttft_deadline": ttft_deadline, "endpoints": [
+        {"base_url": "http://primary/v1", "model": "primary"},
+        {"base_url": "http://secondary/v1", "model": "secondary"},
+    ]}}
+    return AsyncLLMRouter(routes, lambda key, url: clients[url])
+
+
+async def collect(router, answered):
+    return [token async for token in
+            router.stream("parse", MESSAGES, answered)]
+
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = FakeClient(("p",)), FakeClient(("s",))
+    answered = {}
+    tokens = asyncio.run(collect(make_router(primary, secondary), answered))
+    assert tokens == ["p"]
+    assert answered == {"model": "primary"}
+    assert secondary.responses == []
+    assert primary.responses[0].closed
+
+
+def test_stalled_primary_loses_to_hedge():
+    primary = FakeClient(("slow",), ttft=1.0)
+    secondary = FakeClient(("s1", "s2"))
+    answered = {}
+    tokens = asyncio.run(collect(make_router(primary, secondary), answered))
+    assert tokens == ["s1", "s2"]
+    assert answered == {"model": "secondary"}
+    # The losing stream is closed rather than left to run
+    assert primary.responses[0].closed
+
+
+def test_failed_primary_fails_over_without_waiting():
+    primary = FakeClient(fail=True)
+    secondary = FakeClient(("s",))
+    answered = {}
+    router = make_router(primary, secondary, ttft_deadline=10.0)
+    tokens = asyncio.run(asyncio.wait_for(collect(router, answered), 1.0))
+    assert tokens == ["s"]
+    assert answered == {"model": "secondary"}
+
+
+def test_all_endpoints_failing_raises_last_error():
+    router = make_router(FakeClient(fail=True), FakeClient(fail=True))
+    with pytest.raises(ConnectionError, match="secondary"):
+        asyncio.run(collect(router, {}))
+
+
+def test_closing_early_closes_the_winning_stream():
+    primary = FakeClient(("a", "b", "c"))
+
+    async def first_token():
+        tokens = make_router(primary, FakeClient()).stream("parse", MESSAGES)
+        try:
+            return await anext(tokens)
+        finally:
+            await tokens.aclose()
+
+    assert asyncio.run(first_token()) == "a"
+    assert primary.responses[0].closed
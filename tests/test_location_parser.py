@@ -0,0 +1,33 @@
+import pytest
+
+from location_parser import LocationIndex, UnknownLocation
+
+NAMES = ["Alien", "Cafeteria", "Force Field", "Jabba's Palace"]
+
+
+def test_parse_route_question():
+    index = LocationIndex(NAMES)
+    assert index.parse("How do I get from Force Field to Cafeteria?") \
+        == ("Force Field", "Cafeteria")
+    assert index.parse("Take me to the Cafeteria from Alien please") \
+        == ("Alien", "Cafeteria")
+
+
+def test_parse_where_question():
+    index = LocationIndex(NAMES)
+    assert index.parse("Where is Jabba's Palace?") == (None, "Jabba's Palace")
+
+
+def test_span_that_only_mentions_a_location_is_not_resolved():
+    index = LocationIndex(NAMES)
+    assert index.resolve("the room next to the Cafeteria") is None
+    assert index.parse(
+        "How do I get from Alien to the room next to the Cafeteria") is None
+
+
+def test_lookup_only_suggests_a_mentioned_location():
+    index = LocationIndex(NAMES)
+    with pytest.raises(UnknownLocation) as raised:
+        index.lookup("the room next to the Cafeteria")
+    assert raised.value.candidates[0][0] == "Cafeteria"
+    assert index.lookup("Cafeteria") == "Cafeteria"
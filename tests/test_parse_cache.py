@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from endeavor_rag_directory import (
+    QWEN_MODEL, AsyncEndeavorRAG, EndeavorRAG, ParsedQuery, cached_parse,
+    store_parse,
+)
+from llm_cache import LLMCache
+from location_parser import LocationIndex, UnknownLocation
+
+NAMES = ["Alien", "Cafeteria", "Shannon's Pantry/Bar"]
+
+
+@pytest.fixture
+def rag(tmp_path):
+    rag = AsyncEndeavorRAG(driver=None,
+                           cache=LLMCache(str(tmp_path / "cache.sqlite3")))
+    index = LocationIndex(NAMES)
+
+    async def get_location_index():
+        return index
+    rag.get_location_index = get_location_index
+    return rag
+
+
+def test_resolved_llm_parse_is_cached_with_resolved_names(rag):
+    query = "how do i get from the alien to shannons pantry"
+    parsed = ParsedQuery("Alien", "Shannon's Pantry", "some-model")
+    assert asyncio.run(rag.resolve_parsed(query, parsed)) \
+        == ("Alien", "Shannon's Pantry/Bar")
+    assert cached_parse(rag.cache, query, "some-model") \
+        == ParsedQuery("Alien", "Shannon's Pantry/Bar", None)
+
+
+def test_unresolved_llm_parse_is_not_cached(rag):
+    query = "how do i get from alien to the wookiee lounge"
+    parsed = ParsedQuery("Alien", "Wookiee Lounge", "some-model")
+    with pytest.raises(UnknownLocation):
+        asyncio.run(rag.resolve_parsed(query, parsed))
+    assert cached_parse(rag.cache, query, "some-model") is None
+
+
+def test_cached_parse_finds_an_answer_from_any_route_model(rag):
+    query = "how do i get from alien to the cafeteria"
+    parsed = ParsedQuery("Alien", "Cafeteria", "hedge-model")
+    asyncio.run(rag.resolve_parsed(query, parsed))
+    assert cached_parse(rag.cache, query, "primary-model") is None
+    assert cached_parse(rag.cache, query, "primary-model", "hedge-model") \
+        == ParsedQuery("Alien", "Cafeteria", None)
+
+
+def test_store_parse_is_keyed_by_model(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    store_parse(cache, "alien to cafeteria", "model-a", "Alien", "Cafeteria")
+    assert cached_parse(cache, "alien to cafeteria", "model-b") is None
+    assert cached_parse(cache, "alien to cafeteria", "model-a") \
+        == ParsedQuery("Alien", "Cafeteria", None)
+    assert cached_parse(None, "alien to cafeteria", "model-a") is None
+
+
+class FakeLLM:
+    """Streams a fixed answer in small chunks and counts the calls."""
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return FakeStream(self.answer)
+
+
+class FakeStream:
+    def __init__(self, text):
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(
+                delta=SimpleNamespace(content=text[i:i + 5]))])
+            for i in range(0, len(text), 5)
+        ]
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sync_rag(tmp_path, monkeypatch):
+    index = LocationIndex(NAMES)
+    # Force the LLM path; the local parser is covered elsewhere
+    monkeypatch.setattr(index, "parse", lambda text: None)
+    monkeypatch.setattr(EndeavorRAG, "location_index",
+                        property(lambda self: index))
+
+    def make(answer):
+        return EndeavorRAG(None, None, None, None, driver=object(),
+                           llm=FakeLLM(answer),
+                           cache=LLMCache(str(tmp_path / "cache.sqlite3")))
+    return make
+
+
+def test_sync_parse_keeps_the_two_name_shape(sync_rag):
+    rag = sync_rag('{"start": "Alien", "end": "Shannon\'s Pantry"}')
+    start, end = rag.parse_user_query("alien to shannons pantry")
+    assert (start, end) == ("Alien", "Shannon's Pantry")
+
+
+def test_sync_resolved_parse_is_cached(sync_rag):
+    query = "how do i get from the alien to shannons pantry"
+    rag = sync_rag('{"start": "Alien", "end": "Shannon\'s Pantry"}')
+    assert rag.resolve_user_query(query) == ("Alien", "Shannon's Pantry/Bar")
+    assert cached_parse(rag.cache, query, QWEN_MODEL) \
+        == ParsedQuery("Alien", "Shannon's Pantry/Bar", None)
+    # The second ask is answered from the cache
+    assert rag.resolve_user_query(query) == ("Alien", "Shannon's Pantry/Bar")
+    assert rag.llm.calls == 1
+
+
+def test_sync_unresolved_parse_is_not_cached(sync_rag):
+    query = "how do i get from alien to the wookiee lounge"
+    rag = sync_rag('{"start": "Alien", "end": "Wookiee Lounge"}')
+    with pytest.raises(UnknownLocation):
+        rag.resolve_user_query(query)
+    assert cached_parse(rag.cache, query, QWEN_MODEL) is None
+    # Plain parsing never writes to the cache
+    rag.parse_user_query(query)
+    assert cached_parse(rag.cache, query, QWEN_MODEL) is None
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from async_recommender import AsyncMeetingRoomRecommender
+from recommender import MeetingRoomRecommender
+
+START = datetime(2025, 6, 26, 9)
+END = START + timedelta(hours=1)
+
+# (room_id, name, grid, capacity, type) as get_available_rooms returns them
+ROOMS = [
+    ("r1", "Apollo", "B2", 8, "ConferenceRoom"),
+    ("r2", "Gemini", "F8", 4, "MeetingRoom"),
+    ("r3", "Mercury", "C3", None, "MeetingRoom"),
+    ("r4", "Skylab", None, 12, "ConferenceRoom"),
+]
+SLOTS = [room + (START + timedelta(minutes=30 * i), END + timedelta(hours=2))
+         for i, room in enumerate(reversed(ROOMS))]
+
+
+class FakeTable:
+    """Covers r3 only, with a walking distance that beats its grid."""
+    def ensure_fresh(self):
+        pass
+
+    def covers(self, cell, room_id):
+        return room_id == "r3"
+
+    def distance(self, cell, room_id, metric="euclidean"):
+        return 0.5
+
+
+class SyncManager:
+    def get_available_rooms(self, *args, **kwargs):
+        return list(ROOMS)
+
+    def find_free_slots(self, *args, **kwargs):
+        return list(SLOTS)
+
+
+class AsyncManager:
+    async def get_available_rooms(self, *args, **kwargs):
+        return list(ROOMS)
+
+    async def find_free_slots(self, *args, **kwargs):
+        return list(SLOTS)
+
+
+def recommenders(table=None):
+    return (MeetingRoomRecommender(None, SyncManager(), table),
+            AsyncMeetingRoomRecommender(AsyncManager(), table))
+
+
+def test_recommend_matches_sync():
+    for table in (None, FakeTable()):
+        sync, async_ = recommenders(table)
+        expected = sync.recommend(["A1", "C4"], START, END, top_k=3)
+        assert asyncio.run(async_.recommend(["A1", "C4"], START, END,
+                                            top_k=3)) == expected
+        assert [name for name, *_ in expected][0] == \
+            ("Mercury" if table else "Apollo")
+
+
+def test_recommend_earliest_matches_sync():
+    sync, async_ = recommenders(FakeTable())
+    args = (["A1"], START, END + timedelta(hours=2), timedelta(minutes=30))
+    expected = sync.recommend_earliest(*args)
+    assert asyncio.run(async_.recommend_earliest(*args)) == expected
+    assert len(expected) == 3
@@ -0,0 +1,30 @@
+from async_recommender import AsyncPostgresBookingManager
+from recommender import PostgresBookingManager
+
+# Rooms as importData.py stores them today: no capacity in the map data
+ROOMS = [(1, None), (2, 4), (3, 10)]
+
+
+def test_capacity_filter_keeps_rooms_with_unknown_capacity():
+    filters, params = PostgresBookingManager._room_filters(min_capacity=6)
+    assert "r.capacity IS NULL OR r.capacity >= %(min_capacity)s" in filters
+    assert params == {"min_capacity": 6}
+
+
+def test_async_capacity_filter_keeps_rooms_with_unknown_capacity():
+    filters, args = AsyncPostgresBookingManager._room_filters(
+        min_capacity=6, first_param=3)
+    assert "r.capacity IS NULL OR r.capacity >= $3" in filters
+    assert args == [6]
+
+
+def test_capacity_filter_in_postgres(pg_conn):
+    filters, params = PostgresBookingManager._room_filters(min_capacity=6)
+    values = ", ".join(f"({i}, {'NULL' if c is None else c}::int)"
+                       for i, c in ROOMS)
+    with pg_conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT r.room_id FROM (VALUES {values}) AS r(room_id, capacity)
+            WHERE true {filters} ORDER BY r.room_id
+        """, params)
+        assert [row[0] for row in cur.fetchall()] == [1, 3]
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from syncBookings import sync_bookings
+
+# Temp tables shadow the real ones for this connection only, so nothing is
+# kept; each sync is committed like syncBookings.main does
+SCHEMA = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+CREATE TEMP TABLE rooms (room_id TEXT PRIMARY KEY);
+CREATE TEMP TABLE bookings (
+    booking_id  SERIAL PRIMARY KEY,
+    room_id     TEXT REFERENCES rooms(room_id),
+    timeslot    TSRANGE NOT NULL,
+    booked_by   TEXT,
+    title       TEXT,
+    created_at  TIMESTAMPTZ DEFAULT now(),
+    external_id TEXT,
+    CONSTRAINT no_overlap EXCLUDE USING gist (room_id WITH =, timeslot WITH &&)
+);
+INSERT INTO rooms VALUES ('R1');
+"""
+
+
+def booking(external_id, start, end, title="sync"):
+    return {"external_id": external_id, "room_id": "R1", "start": start,
+            "end": end, "booked_by": "upstream", "title": title}
+
+
+def bookings(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT booking_id, external_id, lower(timeslot) "
+                    "FROM bookings ORDER BY external_id")
+        return cur.fetchall()
+
+
+def test_two_bookings_swapping_slots(pg_conn):
+    with pg_conn.cursor() as cur:
+        cur.execute(SCHEMA)
+    pg_conn.commit()
+    sync_bookings(pg_conn, [
+        booking("a", "2030-01-07 09:00", "2030-01-07 10:00"),
+        booking("b", "2030-01-07 10:00", "2030-01-07 11:00"),
+    ])
+    pg_conn.commit()
+    before = bookings(pg_conn)
+
+    counts = sync_bookings(pg_conn, [
+        booking("a", "2030-01-07 10:00", "2030-01-07 11:00"),
+        booking("b", "2030-01-07 09:00", "2030-01-07 10:00"),
+    ])
+    pg_conn.commit()
+
+    assert counts["updated"] == 2 and counts["inserted"] == 0
+    after = bookings(pg_conn)
+    # Same bookings (ids kept), slots swapped
+    assert [row[0] for row in after] == [row[0] for row in before]
+    assert after[0][2] == datetime(2030, 1, 7, 10, 0)
+    assert after[1][2] == datetime(2030, 1, 7, 9, 0)
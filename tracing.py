@@ -0,0 +1,213 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+# Lightweight tracing and latency histograms for the navigation pipeline.
+#
+# span("parse") times a block. Spans nest per request (trace and parent ids
+# follow the asyncio task through a ContextVar), every finished span is
+# logged as one JSON line on the "wayfinder.trace" logger, and its duration
+# lands in the wayfinder_stage_seconds histogram. LLM streams add time to
+# first token and tokens per second; Neo4j queries add the server-side
+# timings from their result summaries. render_metrics() returns all
+# histograms in the Prometheus text format for the /metrics route.
+#
+# Tracing is off unless WAYFINDER_TRACING is set (or enable() is called).
+# When off, span() returns one shared no-op object and the LLM and Neo4j
+# hooks return before doing any work, so the disabled cost is a flag check.
+
+ENABLED = os.getenv("WAYFINDER_TRACING", "").lower() not in ("", "0", "false", "no")
+
+log = logging.getLogger("wayfinder.trace")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+RATE_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500)
+
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+
+
+def configure_logging(path=None):
+    """Writes trace lines to `path` (or WAYFINDER_TRACE_FILE), else stderr."""
+    if log.handlers:
+        return
+    path = path or os.getenv("WAYFINDER_TRACE_FILE")
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, Prometheus style."""
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted(self.series.items())
+        for label_values, series in items:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+REGISTRY = []
+STAGE_SECONDS = Histogram(
+    "wayfinder_stage_seconds", "Time spent in each pipeline stage.", ("stage",))
+LLM_TTFT_SECONDS = Histogram(
+    "wayfinder_llm_ttft_seconds", "LLM time to first token.", ("task", "model"))
+LLM_TOKENS_PER_SECOND = Histogram(
+    "wayfinder_llm_tokens_per_second", "LLM streaming rate after the first token.",
+    ("task", "model"), RATE_BUCKETS)
+NEO4J_SECONDS = Histogram(
+    "wayfinder_neo4j_query_seconds",
+    "Neo4j server time until the first record (available) and all records (consumed).",
+    ("query", "phase"))
+
+
+def render_metrics():
+    lines = []
+    for histogram in REGISTRY:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+_current = contextvars.ContextVar("wayfinder_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id",
+                 "start", "_token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:8]
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _current.reset(self._token)
+        STAGE_SECONDS.observe(seconds, self.name)
+        record = {"trace": self.trace_id, "span": self.span_id,
+                  "parent": self.parent_id, "name": self.name,
+                  "ms": round(seconds * 1000, 3), **self.attrs}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        log.info(json.dumps(record, default=str))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name, **attrs):
+    """Times a `with` block as pipeline stage `name` when tracing is on."""
+    if not ENABLED:
+        return NOOP_SPAN
+    return Span(name, attrs)
+
+
+class LLMStreamTimer:
+    """Feed token() per streamed chunk, then finish() once the stream ends."""
+    __slots__ = ("task", "start", "first", "tokens")
+
+    def __init__(self, task):
+        self.task = task
+        self.start = time.perf_counter()
+        self.first = None
+        self.tokens = 0
+
+    def token(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.tokens += 1
+
+    def finish(self, model):
+        if self.first is None:
+            return
+        end = time.perf_counter()
+        ttft = self.first - self.start
+        LLM_TTFT_SECONDS.observe(ttft, self.task, model)
+        rate = None
+        if self.tokens > 1 and end > self.first:
+            rate = (self.tokens - 1) / (end - self.first)
+            LLM_TOKENS_PER_SECOND.observe(rate, self.task, model)
+        current = _current.get()
+        if current is not None:
+            current.set(model=model, ttft_ms=round(ttft * 1000, 1),
+                        tokens=self.tokens,
+                        tokens_per_s=round(rate, 1) if rate else None)
+
+
+def llm_timer(task):
+    """LLMStreamTimer for one call, or None when tracing is off."""
+    return LLMStreamTimer(task) if ENABLED else None
+
+
+def observe_neo4j(query, summary):
+    """Server-side timings from a neo4j ResultSummary (milliseconds)."""
+    available = summary.result_available_after
+    consumed = summary.result_consumed_after
+    if available is not None:
+        NEO4J_SECONDS.observe(available / 1000, query, "available")
+    if consumed is not None:
+        NEO4J_SECONDS.observe(consumed / 1000, query, "consumed")
+    current = _current.get()
+    if current is not None:
+        current.set(server_available_ms=available, server_consumed_ms=consumed)